@@ -0,0 +1,38 @@
+"""Unique poll option index
+
+Revision ID: 3f1b7c2d9e4a
+Revises: dee20ef9a1c1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1b7c2d9e4a'
+down_revision: Union[str, Sequence[str], None] = 'dee20ef9a1c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        DELETE FROM poll_options a
+        USING poll_options b
+        WHERE a.poll_id = b.poll_id
+          AND a.option_index = b.option_index
+          AND a.id > b.id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_poll_options_poll_id_option_index', 'poll_options', ['poll_id', 'option_index']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_poll_options_poll_id_option_index', 'poll_options', type_='unique')
@@ -0,0 +1,42 @@
+"""Chat lookup indexes
+
+Revision ID: 8e4d2a6b1f3c
+Revises: 3f1b7c2d9e4a
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4d2a6b1f3c'
+down_revision: Union[str, Sequence[str], None] = '3f1b7c2d9e4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        DELETE FROM code_lines a
+        USING code_lines b
+        WHERE a.chat_id = b.chat_id
+          AND a.line_number = b.line_number
+          AND a.id > b.id
+        """
+    )
+    op.create_unique_constraint(
+        'uq_code_lines_chat_id_line_number', 'code_lines', ['chat_id', 'line_number']
+    )
+    op.create_index(op.f('ix_code_lines_poll_id'), 'code_lines', ['poll_id'])
+    op.create_index(op.f('ix_polls_chat_id'), 'polls', ['chat_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_polls_chat_id'), table_name='polls')
+    op.drop_index(op.f('ix_code_lines_poll_id'), table_name='code_lines')
+    op.drop_constraint('uq_code_lines_chat_id_line_number', 'code_lines', type_='unique')
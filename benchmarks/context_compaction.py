@@ -0,0 +1,141 @@
+"""
+Сравнение полного и сжатого контекста промпта генерации вариантов опроса.
+
+    python -m benchmarks.context_compaction --sizes 50 200 500 1000
+    python -m benchmarks.context_compaction --sizes 200 1000 --llm --repeat 3
+
+С флагом --llm дополнительно замеряется задержка реального LLM (нужен заполненный .env).
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+from typing import List
+
+from src.external.llm import prompt
+from src.external.llm.context import build_prompt_context, estimate_tokens
+
+
+FUNCTION_TEMPLATES = [
+    [
+        "def {name}(items, limit=10):",
+        "    result = []",
+        "    for item in items:",
+        "        if len(result) >= limit:",
+        "            break",
+        "        result.append(item * {n})",
+        "    return result",
+    ],
+    [
+        "def {name}(text):",
+        "    words = text.split()",
+        "    counts = {{}}",
+        "    for word in words:",
+        "        counts[word] = counts.get(word, 0) + {n}",
+        "    return counts",
+    ],
+    [
+        "class {cls}:",
+        "    def __init__(self, value):",
+        "        self.value = value",
+        "        self.history = []",
+        "    def update(self, delta):",
+        "        self.history.append(self.value)",
+        "        self.value += delta * {n}",
+    ],
+]
+
+
+def generate_program(size: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    lines = ["import os", "import random", "from collections import defaultdict", ""]
+    index = 0
+    while len(lines) < size - 6:
+        template = rng.choice(FUNCTION_TEMPLATES)
+        lines.extend(
+            line.format(name=f"process_{index}", cls=f"Counter{index}", n=rng.randint(1, 9))
+            for line in template
+        )
+        lines.append(f"data_{index} = process_{index}(list(range({rng.randint(5, 50)})))")
+        index += 1
+    lines.extend(
+        [
+            "def main():",
+            "    totals = defaultdict(int)",
+            "    for name in os.listdir('.'):",
+            "        if name.endswith('.py'):",
+            "            totals[name] += random.randint(1, 10)",
+            "            print(name, totals[name])",
+        ]
+    )
+    return lines[:size]
+
+
+def render_prompt(code_lines: List[str]) -> str:
+    return prompt.BASIC_PROMPT.format(last_code_lines=code_lines)
+
+
+async def measure_llm(code_lines: List[str], context: List[str], repeat: int) -> dict:
+    from src.core.config import config
+    from src.external.llm.proxy_api import ProxyAPI
+
+    llm = ProxyAPI(config, logging.getLogger("benchmark"))
+    latencies = {"full": [], "compact": []}
+    try:
+        for _ in range(repeat):
+            for label, lines in (("full", code_lines), ("compact", context)):
+                started = time.perf_counter()
+                await llm.send_message(render_prompt(lines))
+                latencies[label].append(time.perf_counter() - started)
+    finally:
+        await llm.close()
+    return {label: statistics.median(values) for label, values in latencies.items()}
+
+
+async def run(args: argparse.Namespace):
+    header = (
+        f"{'lines':>6} | {'full tok':>8} | {'compact tok':>11} | {'ratio':>6} | "
+        f"{'prompt chars':>17} | {'build ms':>8}"
+    )
+    if args.llm:
+        header += f" | {'llm full s':>10} | {'llm compact s':>13}"
+    print(header)
+    print("-" * len(header))
+
+    for size in args.sizes:
+        code_lines = generate_program(size)
+        started = time.perf_counter()
+        for _ in range(args.build_repeat):
+            context = build_prompt_context(code_lines, args.budget, args.tail)
+        build_ms = (time.perf_counter() - started) * 1000 / args.build_repeat
+
+        full_tokens = estimate_tokens(code_lines)
+        compact_tokens = estimate_tokens(context)
+        row = (
+            f"{size:>6} | {full_tokens:>8} | {compact_tokens:>11} | "
+            f"{compact_tokens / full_tokens:>6.2f} | "
+            f"{len(render_prompt(code_lines)):>7} → {len(render_prompt(context)):>7} | "
+            f"{build_ms:>8.2f}"
+        )
+        if args.llm:
+            latency = await measure_llm(code_lines, context, args.repeat)
+            row += f" | {latency['full']:>10.2f} | {latency['compact']:>13.2f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500, 1000, 2000])
+    parser.add_argument("--budget", type=int, default=1500, help="LLM_CONTEXT_TOKEN_BUDGET")
+    parser.add_argument("--tail", type=int, default=20, help="LLM_CONTEXT_TAIL_LINES")
+    parser.add_argument("--build-repeat", type=int, default=20)
+    parser.add_argument("--llm", action="store_true", help="замерить задержку реального LLM")
+    parser.add_argument("--repeat", type=int, default=3, help="запросов к LLM на размер")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
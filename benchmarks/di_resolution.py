@@ -0,0 +1,133 @@
+"""
+Стоимость разрешения зависимостей dishka на один апдейт.
+
+    python -m benchmarks.di_resolution --iterations 5000
+
+Сравнивает прежнюю схему (конфиг и Redis-хранилища в REQUEST scope) с текущими
+провайдерами. Соединения с Postgres и Redis не открываются: сессия создаётся лениво,
+а хранилища только регистрируют Lua-скрипты.
+"""
+
+import argparse
+import asyncio
+import time
+from logging import Logger
+
+from dishka import Provider, Scope, make_async_container, provide
+from redis import Redis
+from src.core.config import Settings, config
+from src.core.modules.cache import CacheProvider
+from src.core.modules.chat import ChatProvider
+from src.core.modules.code import CodeProvider
+from src.core.modules.config import ConfigProvider
+from src.core.modules.db import DBProvider
+from src.core.modules.llm import LLMProvider
+from src.core.modules.logger import LoggerProvider
+from src.core.modules.poll import PollProvider
+from src.infrastructure.postgres.connection import AsyncSessionLocal, engine
+from src.infrastructure.redis.connection import async_redis_client
+from src.infrastructure.redis.storages.admin import AdminCacheStorage
+from src.infrastructure.redis.storages.code import CodeCacheStorage
+from src.infrastructure.redis.storages.llm_cache import LLMCacheStorage
+from src.infrastructure.redis.storages.poll import PollStorage
+from src.services.chat import ChatService
+from src.services.code_line import CodeLineService
+from src.services.poll import PollService
+from src.services.vote_buffer import VoteBuffer
+
+
+SCENARIOS = {
+    "poll_answer": [Logger, VoteBuffer],
+    "/health": [Logger, PollStorage, LLMCacheStorage, Settings],
+    "/start": [Logger, PollService, CodeLineService, ChatService],
+}
+
+
+class RequestScopedConfigProvider(Provider):
+    @provide(scope=Scope.REQUEST)
+    def get_config(self) -> Settings:
+        return Settings()
+
+
+class RequestScopedCacheProvider(Provider):
+    @provide(scope=Scope.REQUEST)
+    def get_connection(self) -> Redis:
+        return async_redis_client
+
+    # Кэш администраторов появился вместе с APP-scope сервисом и в REQUEST scope не жил
+    @provide(scope=Scope.APP)
+    def admin_cache_storage(self, logger: Logger) -> AdminCacheStorage:
+        return AdminCacheStorage(async_redis_client, logger, config)
+
+    @provide(scope=Scope.REQUEST)
+    def llm_cache_storage(
+        self, redis_client: Redis, logger: Logger, config: Settings
+    ) -> LLMCacheStorage:
+        return LLMCacheStorage(redis_client, logger, config)
+
+    @provide(scope=Scope.REQUEST)
+    def code_cache_storage(
+        self, redis_client: Redis, logger: Logger, config: Settings
+    ) -> CodeCacheStorage:
+        return CodeCacheStorage(redis_client, logger, config)
+
+    @provide(scope=Scope.REQUEST)
+    def poll_storage(self, redis_client: Redis, logger: Logger, config: Settings) -> PollStorage:
+        return PollStorage(redis_client, logger, config)
+
+
+def build_container(request_scoped: bool):
+    from src.main import llm, poll_options_generator, poll_speculator, poll_worker, vote_buffer
+
+    return make_async_container(
+        DBProvider(engine, AsyncSessionLocal),
+        RequestScopedCacheProvider() if request_scoped else CacheProvider(),
+        LoggerProvider(),
+        ChatProvider(),
+        RequestScopedConfigProvider() if request_scoped else ConfigProvider(),
+        LLMProvider(llm, poll_options_generator),
+        PollProvider(poll_worker, poll_speculator, vote_buffer),
+        CodeProvider(),
+    )
+
+
+async def measure(container, dependencies, iterations: int) -> float:
+    for _ in range(min(iterations, 100)):
+        async with container() as request_container:
+            for dependency in dependencies:
+                await request_container.get(dependency)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        async with container() as request_container:
+            for dependency in dependencies:
+                await request_container.get(dependency)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+async def run(iterations: int):
+    containers = {
+        "request scope": build_container(request_scoped=True),
+        "app scope": build_container(request_scoped=False),
+    }
+    header = f"{'scenario':>12} | {'request scope µs':>16} | {'app scope µs':>12} | {'speedup':>7}"
+    print(header)
+    print("-" * len(header))
+    try:
+        for scenario, dependencies in SCENARIOS.items():
+            before = await measure(containers["request scope"], dependencies, iterations)
+            after = await measure(containers["app scope"], dependencies, iterations)
+            print(f"{scenario:>12} | {before:>16.1f} | {after:>12.1f} | {before / after:>6.1f}x")
+    finally:
+        for container in containers.values():
+            await container.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    asyncio.run(run(parser.parse_args().iterations))
+
+
+if __name__ == "__main__":
+    main()
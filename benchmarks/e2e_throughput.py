@@ -0,0 +1,484 @@
+"""
+Сквозной замер пропускной способности: сколько чатов тянет один процесс.
+
+    python -m benchmarks.e2e_throughput --chats 10 100 1000 10000 --output e2e.json
+    python -m benchmarks.e2e_throughput --chats 100 --llm-latency 1.5 --llm-error-rate 0.1
+
+Бот, воркер, сервисы и хендлеры настоящие. Bot API и LLM прокси заменены локальными
+aiohttp-серверами, Redis и Postgres берутся из .env — укажите там одноразовые локальные
+инстансы с применёнными миграциями (alembic upgrade head). Бенчмарк создаёт чаты
+в диапазоне id, начиная с BENCH_CHAT_ID_BASE, и удаляет их до и после замера.
+
+Каждый чат регистрируется через my_chat_member и /start, затем воркер крутит циклы
+«закрытие опроса → новый опрос» с периодом --poll-ttl, а на каждый новый опрос
+приходит --voters голосов через хендлер poll_answer. В отчёт попадают циклы в секунду,
+p50/p99 задержки от дедлайна опроса до отправки следующего и число обращений к Postgres
+и Redis на цикл. Итог печатается таблицей и сохраняется в JSON.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from aiohttp import web
+from redis.asyncio.connection import AbstractConnection
+from sqlalchemy import delete, event, select
+from src.core.config import config
+
+
+BENCH_CHAT_ID_BASE = -1009000000000
+BENCH_ADMIN_ID = 1
+SEED_BATCH = 200
+
+
+class FakeTelegramAPI:
+    def __init__(self, bot_id: int):
+        self.bot_id = bot_id
+        self.poll_sent_at: Dict[int, float] = {}
+        self.polls: asyncio.Queue = asyncio.Queue()
+        self.requests = 0
+        self._ids = itertools.count(1)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        method = request.match_info["method"].lower()
+        data = await request.post()
+        handler = getattr(self, f"_{method}", None)
+        if handler is None:
+            return web.json_response({"ok": True, "result": True})
+        return web.json_response({"ok": True, "result": handler(data)})
+
+    def _chat(self, chat_id) -> dict:
+        return {"id": int(chat_id), "type": "supergroup", "title": f"bench {chat_id}"}
+
+    def _message(self, chat_id, **fields) -> dict:
+        return {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": self._chat(chat_id),
+            **fields,
+        }
+
+    def _getme(self, data) -> dict:
+        return {"id": self.bot_id, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+
+    def _getchat(self, data) -> dict:
+        return {
+            **self._chat(data["chat_id"]),
+            "accent_color_id": 0,
+            "max_reaction_count": 11,
+            "accepted_gift_types": {
+                "unlimited_gifts": False,
+                "limited_gifts": False,
+                "unique_gifts": False,
+                "premium_subscription": False,
+            },
+        }
+
+    def _getchatadministrators(self, data) -> list:
+        return [
+            {
+                "status": "creator",
+                "user": {"id": BENCH_ADMIN_ID, "is_bot": False, "first_name": "admin"},
+                "is_anonymous": False,
+            }
+        ]
+
+    def _sendmessage(self, data) -> dict:
+        return self._message(data["chat_id"], text=data.get("text", ""))
+
+    def _sendpoll(self, data) -> dict:
+        chat_id = int(data["chat_id"])
+        poll_id = f"bench-{next(self._ids)}"
+        options = json.loads(data["options"])
+        self.poll_sent_at[chat_id] = time.time()
+        self.polls.put_nowait((chat_id, poll_id, len(options)))
+        return self._message(
+            chat_id,
+            poll={
+                "id": poll_id,
+                "question": data["question"],
+                "options": [
+                    {"text": option["text"] if isinstance(option, dict) else option}
+                    | {"voter_count": 0}
+                    for option in options
+                ],
+                "total_voter_count": 0,
+                "is_closed": False,
+                "is_anonymous": False,
+                "type": "regular",
+                "allows_multiple_answers": False,
+            },
+        )
+
+
+class FakeLLMProxy:
+    def __init__(self, latency: float, error_rate: float):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._ids = itertools.count(1)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await request.read()
+        if self.latency:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500, text="fake upstream error")
+
+        n = next(self._ids)
+        options = [f"value_{n}_{i} = {i}" for i in range(4)]
+        return web.json_response({"output": [{"content": [{"text": json.dumps(options)}]}]})
+
+
+class RoundTripCounter:
+    def __init__(self, engine):
+        self.postgres = 0
+        self.redis = 0
+        counter = self
+
+        def on_postgres(*_):
+            counter.postgres += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", on_postgres)
+        event.listen(engine.sync_engine, "commit", on_postgres)
+        event.listen(engine.sync_engine, "rollback", on_postgres)
+
+        # Пайплайн уходит в Redis одним send_packed_command, поэтому это и есть round trip
+        send_packed_command = AbstractConnection.send_packed_command
+
+        async def counted_send(connection, *args, **kwargs):
+            counter.redis += 1
+            return await send_packed_command(connection, *args, **kwargs)
+
+        AbstractConnection.send_packed_command = counted_send
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"postgres": self.postgres, "redis": self.redis}
+
+
+async def start_site(app: web.Application) -> Tuple[web.AppRunner, int]:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def chunks(items: List[int], size: int) -> Iterator[List[int]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def chat_member_update(update_id: int, chat_id: int, bot_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "my_chat_member": {
+            "chat": {"id": chat_id, "type": "supergroup", "title": f"bench {chat_id}"},
+            "from": {"id": BENCH_ADMIN_ID, "is_bot": False, "first_name": "admin"},
+            "date": int(time.time()),
+            "old_chat_member": {
+                "status": "left",
+                "user": {"id": bot_id, "is_bot": True, "first_name": "bench"},
+            },
+            "new_chat_member": {
+                "status": "member",
+                "user": {"id": bot_id, "is_bot": True, "first_name": "bench"},
+            },
+        },
+    }
+
+
+def start_command_update(update_id: int, chat_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup", "title": f"bench {chat_id}"},
+            "from": {"id": BENCH_ADMIN_ID, "is_bot": False, "first_name": "admin"},
+            "text": "/start",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+def poll_answer_update(update_id: int, poll_id: str, user_id: int, option: int) -> dict:
+    return {
+        "update_id": update_id,
+        "poll_answer": {
+            "poll_id": poll_id,
+            "user": {"id": user_id, "is_bot": False, "first_name": f"voter {user_id}"},
+            "option_ids": [option],
+        },
+    }
+
+
+class Harness:
+    def __init__(self, args: argparse.Namespace, app, telegram: FakeTelegramAPI, llm_proxy):
+        self.args = args
+        self.app = app
+        self.telegram = telegram
+        self.llm_proxy = llm_proxy
+        self.counter = RoundTripCounter(app.engine)
+        self._update_ids = itertools.count(1)
+        self._recording = False
+        self._latencies: List[float] = []
+        self._cycles = 0
+        self._failed = 0
+        self._votes = 0
+
+        original = app.poll_worker._run_expired_chat
+
+        async def observed(chat_id: int, deadline: float, tick_stats: dict):
+            await original(chat_id, deadline, tick_stats)
+            if not self._recording:
+                return
+            sent_at = self.telegram.poll_sent_at.get(chat_id)
+            if sent_at is not None and sent_at >= deadline:
+                self._cycles += 1
+                self._latencies.append(sent_at - deadline)
+            else:
+                self._failed += 1
+
+        app.poll_worker._run_expired_chat = observed
+
+    async def feed(self, update: dict):
+        from aiogram.types import Update
+
+        await self.app.dp.feed_update(self.app.bot, Update.model_validate(update))
+
+    async def vote_loop(self):
+        while True:
+            chat_id, poll_id, options = await self.telegram.polls.get()
+            for voter in range(self.args.voters):
+                await self.feed(
+                    poll_answer_update(
+                        next(self._update_ids),
+                        poll_id,
+                        abs(chat_id) * 100 + voter,
+                        random.randrange(options),
+                    )
+                )
+                self._votes += 1
+
+    async def cleanup(self, chat_ids: List[int]):
+        from src.infrastructure.postgres.models.chat import Chat
+        from src.infrastructure.postgres.models.code_line import CodeLine
+        from src.infrastructure.postgres.models.poll import Poll
+        from src.infrastructure.postgres.models.poll_option import PollOption
+        from src.infrastructure.redis.storages.code import CodeCacheStorage
+        from src.infrastructure.redis.storages.poll import PollStorage
+
+        low, high = min(chat_ids), max(chat_ids)
+        async with self.app.AsyncSessionLocal() as session:
+            bench_polls = select(Poll.telegram_poll_id).where(Poll.chat_id.between(low, high))
+            await session.execute(delete(CodeLine).where(CodeLine.chat_id.between(low, high)))
+            await session.execute(delete(PollOption).where(PollOption.poll_id.in_(bench_polls)))
+            await session.execute(delete(Poll).where(Poll.chat_id.between(low, high)))
+            await session.execute(delete(Chat).where(Chat.telegram_chat_id.between(low, high)))
+            await session.commit()
+
+        poll_storage = PollStorage(self.app.async_redis_client, self.app.logger, config)
+        code_cache = CodeCacheStorage(self.app.async_redis_client, self.app.logger, config)
+        for batch in chunks(chat_ids, SEED_BATCH):
+            await asyncio.gather(
+                *(self._cleanup_chat(poll_storage, code_cache, chat_id) for chat_id in batch)
+            )
+
+    @staticmethod
+    async def _cleanup_chat(poll_storage, code_cache, chat_id: int):
+        await poll_storage.clear_chat_data(chat_id)
+        await poll_storage.clear_next_poll_time(chat_id)
+        await code_cache.invalidate(chat_id)
+
+    async def seed(self, chat_ids: List[int]):
+        latency, self.llm_proxy.latency = self.llm_proxy.latency, 0.0
+        error_rate, self.llm_proxy.error_rate = self.llm_proxy.error_rate, 0.0
+        try:
+            for batch in chunks(chat_ids, SEED_BATCH):
+                await asyncio.gather(*(self._seed_chat(chat_id) for chat_id in batch))
+        finally:
+            self.llm_proxy.latency = latency
+            self.llm_proxy.error_rate = error_rate
+
+    async def _seed_chat(self, chat_id: int):
+        await self.feed(chat_member_update(next(self._update_ids), chat_id, self.app.bot.id))
+        await self.feed(start_command_update(next(self._update_ids), chat_id))
+
+    async def run_size(self, chats: int) -> dict:
+        chat_ids = [BENCH_CHAT_ID_BASE - index for index in range(chats)]
+        await self.cleanup(chat_ids)
+        started = time.perf_counter()
+        await self.seed(chat_ids)
+        seed_seconds = time.perf_counter() - started
+
+        vote_task = asyncio.create_task(self.vote_loop())
+        await self.app.poll_worker.start()
+        try:
+            await asyncio.sleep(self.args.warmup)
+            self._latencies, self._cycles, self._failed, self._votes = [], 0, 0, 0
+            before = self.counter.snapshot()
+            llm_before = (self.llm_proxy.requests, self.llm_proxy.errors)
+            self._recording = True
+            started = time.perf_counter()
+            await asyncio.sleep(self.args.duration)
+            elapsed = time.perf_counter() - started
+            self._recording = False
+            after = self.counter.snapshot()
+        finally:
+            await self.app.poll_worker.stop()
+            vote_task.cancel()
+            await self.app.vote_buffer.flush()
+            await self.cleanup(chat_ids)
+
+        cycles = self._cycles
+        return {
+            "chats": chats,
+            "seed_seconds": round(seed_seconds, 2),
+            "duration": round(elapsed, 2),
+            "cycles": cycles,
+            "failed_cycles": self._failed,
+            "cycles_per_second": round(cycles / elapsed, 2),
+            "latency_p50": _round(percentile(self._latencies, 50)),
+            "latency_p99": _round(percentile(self._latencies, 99)),
+            "votes": self._votes,
+            "llm_requests": self.llm_proxy.requests - llm_before[0],
+            "llm_errors": self.llm_proxy.errors - llm_before[1],
+            "postgres_round_trips_per_cycle": _per_cycle(after, before, "postgres", cycles),
+            "redis_round_trips_per_cycle": _per_cycle(after, before, "redis", cycles),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def _per_cycle(after: dict, before: dict, key: str, cycles: int) -> Optional[float]:
+    return round((after[key] - before[key]) / cycles, 1) if cycles else None
+
+
+def configure(args: argparse.Namespace, telegram_port: int, llm_port: int):
+    config.LLM_PROXY_BASE_URL = f"http://127.0.0.1:{llm_port}/"
+    config.LLM_CACHE_ENABLED = args.llm_cache
+    config.LLM_MAX_RETRIES = 0
+    config.POLL_TTL = args.poll_ttl
+    config.WORKER_CONCURRENCY = args.concurrency
+    config.SPECULATIVE_BUDGET = 0
+    config.METRICS_PORT = 0
+    if not args.telegram_limits:
+        config.TG_GLOBAL_RATE = config.TG_CHAT_RATE = config.TG_GROUP_RATE = 1_000_000
+        config.TG_CHAT_BURST = 1_000_000
+
+
+async def run(args: argparse.Namespace):
+    from aiogram.client.telegram import TelegramAPIServer
+
+    bot_id = int(config.BOT_TOKEN.split(":")[0])
+    telegram = FakeTelegramAPI(bot_id)
+    llm_proxy = FakeLLMProxy(args.llm_latency, args.llm_error_rate)
+    telegram_runner, telegram_port = await start_site(telegram.build_app())
+    llm_runner, llm_port = await start_site(llm_proxy.build_app())
+    configure(args, telegram_port, llm_port)
+
+    import src.main as app
+
+    logging.getLogger().setLevel(args.log_level)
+    app.bot.session.api = TelegramAPIServer.from_base(f"http://127.0.0.1:{telegram_port}")
+    await app.dp.emit_startup(bot=app.bot)
+    harness = Harness(args, app, telegram, llm_proxy)
+
+    header = (
+        f"{'chats':>6} | {'cycles/s':>8} | {'p50 s':>7} | {'p99 s':>7} | {'failed':>6} | "
+        f"{'pg/cycle':>8} | {'redis/cycle':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    results = []
+    try:
+        for chats in args.chats:
+            result = await harness.run_size(chats)
+            results.append(result)
+            print(
+                f"{chats:>6} | {result['cycles_per_second']:>8} | "
+                f"{_fmt(result['latency_p50']):>7} | {_fmt(result['latency_p99']):>7} | "
+                f"{result['failed_cycles']:>6} | "
+                f"{_fmt(result['postgres_round_trips_per_cycle']):>8} | "
+                f"{_fmt(result['redis_round_trips_per_cycle']):>11}"
+            )
+    finally:
+        await app.on_shutdown()
+        await app.bot.session.close()
+        await telegram_runner.cleanup()
+        await llm_runner.cleanup()
+
+    report = {
+        "benchmark": "e2e_throughput",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output", "log_level")
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "—" if value is None else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--duration", type=float, default=30.0, help="секунд замера на размер")
+    parser.add_argument("--warmup", type=float, default=5.0, help="секунд прогрева на размер")
+    parser.add_argument("--poll-ttl", type=float, default=1.0, help="POLL_TTL в секундах")
+    parser.add_argument("--concurrency", type=int, default=config.WORKER_CONCURRENCY)
+    parser.add_argument("--voters", type=int, default=3, help="голосов на каждый опрос")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="средняя задержка LLM")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-cache", action="store_true", help="не отключать кэш LLM")
+    parser.add_argument(
+        "--telegram-limits", action="store_true", help="оставить лимиты исходящих в Telegram"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="файл для JSON-отчёта, по умолчанию stdout")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Синтетическая нагрузка голосами и командами: где насыщается один процесс бота.
+
+    python -m benchmarks.load_generator --rates 100 500 1000 2000 5000 --output load.json
+    python -m benchmarks.load_generator --chats 50 --users-per-chat 300 --change-ratio 0.4 \\
+        --command-rate 20 --command-mix code=0.5,sendnow=0.3,start=0.2
+
+Апдейты PollAnswer и Message подаются в настоящий Dispatcher через feed_update, каждый
+отдельной задачей, как при polling. Bot API и LLM прокси заменены локальными
+aiohttp-серверами из e2e_throughput, Redis и Postgres берутся из .env — укажите там
+одноразовые локальные инстансы с применёнными миграциями.
+
+Голоса идут открытым потоком (пуассоновский процесс) с частотой из --rates, по этапу
+на каждую частоту. Часть голосов меняет или отзывает уже поданный голос, команды
+приходят со своей частотой: от администратора с вероятностью --admin-ratio, иначе
+от обычного участника, и тогда их отсекают фильтры. Для каждого вида апдейта и для
+фильтров администратора пишутся распределения задержек, параллельно меряется лаг
+event loop. Этап считается насыщенным, если за его время обработано меньше 95%
+поданных голосов.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.e2e_throughput import (
+    BENCH_ADMIN_ID,
+    BENCH_CHAT_ID_BASE,
+    FakeLLMProxy,
+    FakeTelegramAPI,
+    Harness,
+    percentile,
+    start_site,
+)
+from src.core.config import config
+
+
+COMMANDS = ("code", "sendnow", "start")
+SATURATION_RATIO = 0.95
+USER_ID_BASE = 1_000_000
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        command, _, weight = item.strip().partition("=")
+        command = command.lstrip("/")
+        if command not in COMMANDS:
+            raise argparse.ArgumentTypeError(f"неизвестная команда: {command}")
+        try:
+            mix[command] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"некорректный вес: {item}")
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("сумма весов команд должна быть больше нуля")
+    return mix
+
+
+def vote_update(update_id: int, poll_id: str, user_id: int, option_ids: List[int]) -> dict:
+    return {
+        "update_id": update_id,
+        "poll_answer": {
+            "poll_id": poll_id,
+            "user": {"id": user_id, "is_bot": False, "first_name": f"voter {user_id}"},
+            "option_ids": option_ids,
+        },
+    }
+
+
+def command_update(update_id: int, chat_id: int, user_id: int, command: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup", "title": f"bench {chat_id}"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"user {user_id}"},
+            "text": f"/{command}",
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command) + 1}],
+        },
+    }
+
+
+class StageStats:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.ends_at = float("inf")
+        self.sent: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.votes_in_time = 0
+        self.loop_lag: List[float] = []
+
+
+class LoadGenerator(Harness):
+    def __init__(self, args: argparse.Namespace, app, telegram: FakeTelegramAPI, llm_proxy):
+        super().__init__(args, app, telegram, llm_proxy)
+        self.chat_ids = [BENCH_CHAT_ID_BASE - index for index in range(args.chats)]
+        self.polls: Dict[int, Tuple[str, int]] = {}
+        self.votes: Dict[int, Dict[int, int]] = {chat_id: {} for chat_id in self.chat_ids}
+        self.stage: Optional[StageStats] = None
+        self._in_flight = set()
+        self._commands = list(args.command_mix)
+        self._weights = list(args.command_mix.values())
+
+    def instrument_filter(self, filter_class):
+        original = filter_class.__call__
+        kind = f"filter:{filter_class.__name__}"
+
+        # Параметры фильтров aiogram уже прочитал при регистрации роутеров,
+        # поэтому обёртке достаточно прокинуть их как есть
+        @functools.wraps(original)
+        async def timed(filter_self, *args, **kwargs):
+            stage, started = self.stage, time.perf_counter()
+            try:
+                return await original(filter_self, *args, **kwargs)
+            finally:
+                if stage is not None:
+                    stage.latencies[kind].append(time.perf_counter() - started)
+
+        filter_class.__call__ = timed
+
+    async def poll_loop(self):
+        while True:
+            chat_id, poll_id, options = await self.telegram.polls.get()
+            self.polls[chat_id] = (poll_id, options)
+            self.votes[chat_id] = {}
+
+    async def monitor_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        interval = self.args.lag_interval
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            if self.stage is not None:
+                self.stage.loop_lag.append(loop.time() - started - interval)
+
+    def dispatch(self, kind: str, update: dict):
+        stage = self.stage
+        stage.sent[kind] += 1
+        task = asyncio.create_task(self._feed(stage, kind, update))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _feed(self, stage: StageStats, kind: str, update: dict):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await self.feed(update)
+        except Exception:
+            stage.errors[kind] += 1
+        finished = loop.time()
+        stage.latencies[kind].append(finished - started)
+        if kind in ("vote", "change", "retract") and finished <= stage.ends_at:
+            stage.votes_in_time += 1
+
+    def next_vote(self) -> Optional[Tuple[str, dict]]:
+        chat_id = random.choice(self.chat_ids)
+        if chat_id not in self.polls:
+            return None
+        poll_id, options = self.polls[chat_id]
+        votes = self.votes[chat_id]
+
+        roll = random.random()
+        if votes and roll < self.args.retract_ratio:
+            user_id = next(iter(votes))
+            del votes[user_id]
+            return "retract", vote_update(next(self._update_ids), poll_id, user_id, [])
+
+        if votes and roll < self.args.retract_ratio + self.args.change_ratio:
+            # Давно голосовавшие передумывают первыми, после смены уходят в конец очереди
+            user_id = next(iter(votes))
+            option = (votes.pop(user_id) + 1) % options
+            kind = "change"
+        else:
+            user_id = self.user_id(chat_id, random.randrange(self.args.users_per_chat))
+            option = random.randrange(options)
+            previous = votes.pop(user_id, None)
+            if previous == option:
+                # Telegram не присылает повторный голос за тот же вариант
+                option = (option + 1) % options
+            kind = "vote" if previous is None else "change"
+        votes[user_id] = option
+        return kind, vote_update(next(self._update_ids), poll_id, user_id, [option])
+
+    def user_id(self, chat_id: int, index: int) -> int:
+        return USER_ID_BASE + (BENCH_CHAT_ID_BASE - chat_id) * self.args.users_per_chat + index
+
+    def next_command(self) -> Tuple[str, dict]:
+        command = random.choices(self._commands, self._weights)[0]
+        chat_id = random.choice(self.chat_ids)
+        if random.random() < self.args.admin_ratio:
+            user_id, role = BENCH_ADMIN_ID, "admin"
+        else:
+            user_id = self.user_id(chat_id, random.randrange(self.args.users_per_chat))
+            role = "user"
+        update = command_update(next(self._update_ids), chat_id, user_id, command)
+        return f"/{command}:{role}", update
+
+    async def produce(self, rate: float, duration: float, make_update):
+        if rate <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        next_at = started + random.expovariate(rate)
+        while True:
+            now = loop.time()
+            if now - started >= duration:
+                return
+            # Отстающий генератор догоняет пачкой, чтобы поток оставался открытым
+            while next_at <= now:
+                generated = make_update()
+                if generated is not None:
+                    self.dispatch(*generated)
+                next_at += random.expovariate(rate)
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+
+    async def run_stage(self, rate: float) -> dict:
+        loop = asyncio.get_running_loop()
+        stage = self.stage = StageStats(rate)
+        started = loop.time()
+        stage.ends_at = started + self.args.duration
+        await asyncio.gather(
+            self.produce(rate, self.args.duration, self.next_vote),
+            self.produce(self.args.command_rate, self.args.duration, self.next_command),
+        )
+        elapsed = loop.time() - started
+
+        drain_started = loop.time()
+        if self._in_flight:
+            await asyncio.wait(set(self._in_flight), timeout=self.args.drain_timeout)
+        drain = loop.time() - drain_started
+        self.stage = None
+        return self.summarize(stage, elapsed, drain)
+
+    def summarize(self, stage: StageStats, elapsed: float, drain: float) -> dict:
+        sent_votes = sum(stage.sent[kind] for kind in ("vote", "change", "retract"))
+        latency = {}
+        for kind in sorted(stage.latencies):
+            values = stage.latencies[kind]
+            latency[kind] = {
+                "count": len(values),
+                "errors": stage.errors.get(kind, 0),
+                "p50_ms": _ms(percentile(values, 50)),
+                "p95_ms": _ms(percentile(values, 95)),
+                "p99_ms": _ms(percentile(values, 99)),
+                "max_ms": _ms(max(values)),
+            }
+        return {
+            "rate": stage.rate,
+            "duration": round(elapsed, 2),
+            "drain_seconds": round(drain, 2),
+            "sent": dict(stage.sent),
+            "votes_per_second": round(stage.votes_in_time / elapsed, 1),
+            "saturated": stage.votes_in_time < sent_votes * SATURATION_RATIO,
+            "unfinished": len(self._in_flight),
+            "latency": latency,
+            "loop_lag": {
+                "p50_ms": _ms(percentile(stage.loop_lag, 50)),
+                "p99_ms": _ms(percentile(stage.loop_lag, 99)),
+                "max_ms": _ms(max(stage.loop_lag, default=None)),
+            },
+        }
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return round(value * 1000, 2) if value is not None else None
+
+
+def configure(args: argparse.Namespace, llm_port: int):
+    config.LLM_PROXY_BASE_URL = f"http://127.0.0.1:{llm_port}/"
+    config.LLM_CACHE_ENABLED = False
+    config.LLM_MAX_RETRIES = 0
+    config.SPECULATIVE_BUDGET = 0
+    config.METRICS_PORT = 0
+    if not args.telegram_limits:
+        config.TG_GLOBAL_RATE = config.TG_CHAT_RATE = config.TG_GROUP_RATE = 1_000_000
+        config.TG_CHAT_BURST = 1_000_000
+
+
+async def run(args: argparse.Namespace):
+    from aiogram.client.telegram import TelegramAPIServer
+
+    bot_id = int(config.BOT_TOKEN.split(":")[0])
+    telegram = FakeTelegramAPI(bot_id)
+    llm_proxy = FakeLLMProxy(args.llm_latency, 0.0)
+    telegram_runner, telegram_port = await start_site(telegram.build_app())
+    llm_runner, llm_port = await start_site(llm_proxy.build_app())
+    configure(args, llm_port)
+
+    import src.main as app
+    from src.filters.admin import AdminFilter
+    from src.filters.admin_or_private import AdminOrPrivateFilter
+
+    logging.getLogger().setLevel(args.log_level)
+    app.bot.session.api = TelegramAPIServer.from_base(f"http://127.0.0.1:{telegram_port}")
+    await app.dp.emit_startup(bot=app.bot)
+    generator = LoadGenerator(args, app, telegram, llm_proxy)
+    generator.instrument_filter(AdminFilter)
+    generator.instrument_filter(AdminOrPrivateFilter)
+
+    header = (
+        f"{'rate':>6} | {'votes/s':>8} | {'vote p50':>8} | {'vote p99':>8} | "
+        f"{'filter p99':>10} | {'lag p99':>7} | {'lag max':>7} | {'errors':>6} | saturated"
+    )
+    results = []
+    background = []
+    try:
+        await generator.cleanup(generator.chat_ids)
+        await generator.seed(generator.chat_ids)
+        background = [
+            asyncio.create_task(generator.poll_loop()),
+            asyncio.create_task(generator.monitor_loop_lag()),
+        ]
+        await asyncio.sleep(0)
+        print(f"Подготовлено {len(telegram.poll_sent_at)} чатов с активным опросом\n")
+        print(header)
+        print("-" * len(header))
+
+        for rate in args.rates:
+            result = await generator.run_stage(rate)
+            results.append(result)
+            vote = result["latency"].get("vote", {})
+            filters = [
+                stats["p99_ms"]
+                for kind, stats in result["latency"].items()
+                if kind.startswith("filter:") and stats["p99_ms"] is not None
+            ]
+            errors = sum(stats["errors"] for stats in result["latency"].values())
+            print(
+                f"{rate:>6} | {result['votes_per_second']:>8} | "
+                f"{_fmt(vote.get('p50_ms')):>8} | {_fmt(vote.get('p99_ms')):>8} | "
+                f"{_fmt(max(filters, default=None)):>10} | "
+                f"{_fmt(result['loop_lag']['p99_ms']):>7} | "
+                f"{_fmt(result['loop_lag']['max_ms']):>7} | {errors:>6} | "
+                f"{'да' if result['saturated'] else 'нет'}"
+            )
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await app.vote_buffer.flush()
+        await generator.cleanup(generator.chat_ids)
+        await app.on_shutdown()
+        await app.bot.session.close()
+        await telegram_runner.cleanup()
+        await llm_runner.cleanup()
+
+    report = {
+        "benchmark": "load_generator",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output", "log_level")
+        },
+        "vote_buffer": app.vote_buffer.get_stats(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "—" if value is None else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--users-per-chat", type=int, default=100)
+    parser.add_argument(
+        "--rates", type=float, nargs="+", default=[100, 500, 1000, 2000, 5000], help="голосов/с"
+    )
+    parser.add_argument("--change-ratio", type=float, default=0.2, help="доля смен голоса")
+    parser.add_argument("--retract-ratio", type=float, default=0.05, help="доля отзывов голоса")
+    parser.add_argument("--command-rate", type=float, default=5.0, help="команд в секунду")
+    parser.add_argument(
+        "--command-mix", type=parse_mix, default=parse_mix("code=0.6,sendnow=0.3,start=0.1")
+    )
+    parser.add_argument("--admin-ratio", type=float, default=0.5, help="доля команд от админа")
+    parser.add_argument("--duration", type=float, default=20.0, help="секунд на этап")
+    parser.add_argument("--drain-timeout", type=float, default=30.0)
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="шаг замера лага loop")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="средняя задержка LLM")
+    parser.add_argument(
+        "--telegram-limits", action="store_true", help="оставить лимиты исходящих в Telegram"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="файл для JSON-отчёта, по умолчанию stdout")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
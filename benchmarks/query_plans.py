@@ -0,0 +1,251 @@
+"""
+Планы и время запросов шлюзов Postgres до и после индексов по чату.
+
+    python -m benchmarks.query_plans --chats 2000 --polls-per-chat 50 --lines-per-chat 50
+
+Таблицы создаются по моделям в отдельной схеме bench_query_plans базы из .env и
+заполняются синтетической историей: чаты, завершённые опросы с вариантами и строки
+кода вперемешку, как они копятся за время жизни бота. Замер «до» идёт на схеме
+начальной миграции, без индексов по chat_id, poll_id и line_number, замер «после» —
+с индексами из миграций 3f1b7c2d9e4a и 8e4d2a6b1f3c. Для каждого запроса печатаются
+узлы сканирования из EXPLAIN ANALYZE и медианное время выполнения вместе с проверками
+внешних ключей. Удаления выполняются в транзакции, которая затем откатывается.
+Схема удаляется по окончании замера.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+from src.infrastructure.postgres.connection import DATABASE_URL, Base
+from src.infrastructure.postgres.models.code_line import CodeLine
+from src.infrastructure.postgres.models.poll import Poll
+from src.infrastructure.postgres.models.poll_option import PollOption
+
+
+SCHEMA = "bench_query_plans"
+
+INDEXES = [
+    (
+        "ALTER TABLE code_lines ADD CONSTRAINT uq_code_lines_chat_id_line_number "
+        "UNIQUE (chat_id, line_number)",
+        "ALTER TABLE code_lines DROP CONSTRAINT uq_code_lines_chat_id_line_number",
+    ),
+    (
+        "CREATE INDEX ix_code_lines_poll_id ON code_lines (poll_id)",
+        "DROP INDEX ix_code_lines_poll_id",
+    ),
+    (
+        "CREATE INDEX ix_polls_chat_id ON polls (chat_id)",
+        "DROP INDEX ix_polls_chat_id",
+    ),
+    (
+        "ALTER TABLE poll_options ADD CONSTRAINT uq_poll_options_poll_id_option_index "
+        "UNIQUE (poll_id, option_index)",
+        "ALTER TABLE poll_options DROP CONSTRAINT uq_poll_options_poll_id_option_index",
+    ),
+]
+
+SEED = [
+    """
+    INSERT INTO chats (telegram_chat_id, title, created_at)
+    SELECT -c, 'bench ' || c, now() FROM generate_series(1, :chats) c
+    """,
+    """
+    INSERT INTO polls (chat_id, telegram_poll_id, question, status, created_at, finished_at)
+    SELECT -c, 'bench-' || c || '-' || p, 'next line?', 'finished', now(), now()
+    FROM generate_series(1, :chats) c, generate_series(1, :polls) p
+    ORDER BY random()
+    """,
+    """
+    INSERT INTO poll_options (poll_id, option_index, option_text)
+    SELECT telegram_poll_id, o, 'value_' || o || ' = ' || o
+    FROM polls, generate_series(0, 3) o
+    ORDER BY random()
+    """,
+    """
+    INSERT INTO code_lines (chat_id, poll_id, line_number, content, created_at)
+    SELECT -c, 'bench-' || c || '-' || ((l - 1) % :polls + 1), l, 'line_' || l || ' = ' || l, now()
+    FROM generate_series(1, :chats) c, generate_series(1, :lines) l
+    ORDER BY random()
+    """,
+]
+
+
+def gateway_queries(chat_id: int, poll_id: str) -> Dict[str, list]:
+    # Те же выражения, что строят шлюзы; удаления идут в порядке PollService.clear_chat
+    return {
+        "get_chat_code": [
+            select(CodeLine).where(CodeLine.chat_id == chat_id).order_by(CodeLine.line_number)
+        ],
+        "get_poll_option": [
+            select(PollOption).where(PollOption.poll_id == poll_id, PollOption.option_index == 2)
+        ],
+        "delete_chat_code": [delete(CodeLine).where(CodeLine.chat_id == chat_id)],
+        "delete_chat_poll_options": [
+            delete(CodeLine).where(CodeLine.chat_id == chat_id),
+            delete(PollOption).where(
+                PollOption.poll_id.in_(select(Poll.telegram_poll_id).where(Poll.chat_id == chat_id))
+            ),
+        ],
+        "delete_chat_polls": [
+            delete(CodeLine).where(CodeLine.chat_id == chat_id),
+            delete(PollOption).where(
+                PollOption.poll_id.in_(select(Poll.telegram_poll_id).where(Poll.chat_id == chat_id))
+            ),
+            delete(Poll).where(Poll.chat_id == chat_id),
+        ],
+    }
+
+
+def compile_sql(statement) -> str:
+    return str(
+        statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    )
+
+
+def scan_nodes(plan: dict) -> List[str]:
+    nodes = []
+    if "Scan" in plan["Node Type"]:
+        node = f"{plan['Node Type']} on {plan.get('Relation Name', '?')}"
+        if plan.get("Index Name"):
+            node += f" using {plan['Index Name']}"
+        nodes.append(node)
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+async def explain(connection: AsyncConnection, statements: list) -> dict:
+    # Предыдущие выражения подготавливают данные, замеряется последнее
+    try:
+        for statement in statements[:-1]:
+            await connection.execute(statement)
+        result = await connection.execute(
+            text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compile_sql(statements[-1])}")
+        )
+        report = result.scalar()
+    finally:
+        await connection.rollback()
+
+    if isinstance(report, str):
+        report = json.loads(report)
+    report = report[0]
+    triggers = sum(trigger["Time"] for trigger in report.get("Triggers", []))
+    plan = report["Plan"]
+    return {
+        "time_ms": report["Execution Time"],
+        "triggers_ms": triggers,
+        "scans": scan_nodes(plan),
+        "shared_blocks": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+    }
+
+
+async def measure(connection: AsyncConnection, queries: Dict[str, list], repeat: int) -> dict:
+    await connection.execute(text("ANALYZE"))
+    await connection.commit()
+    results = {}
+    for name, statements in queries.items():
+        runs = [await explain(connection, statements) for _ in range(repeat)]
+        last = runs[-1]
+        results[name] = {
+            "time_ms": round(statistics.median(run["time_ms"] for run in runs), 3),
+            "triggers_ms": round(statistics.median(run["triggers_ms"] for run in runs), 3),
+            "scans": last["scans"],
+            "shared_blocks": last["shared_blocks"],
+        }
+    return results
+
+
+async def prepare(connection: AsyncConnection, args: argparse.Namespace):
+    await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await connection.execute(text(f"SET search_path TO {SCHEMA}"))
+    await connection.run_sync(
+        lambda sync_connection: Base.metadata.create_all(
+            sync_connection.execution_options(schema_translate_map={None: SCHEMA})
+        )
+    )
+    for _, drop in INDEXES:
+        await connection.execute(text(drop))
+    for statement in SEED:
+        await connection.execute(
+            text(statement),
+            {"chats": args.chats, "polls": args.polls_per_chat, "lines": args.lines_per_chat},
+        )
+    await connection.commit()
+
+
+async def run(args: argparse.Namespace):
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    chat = args.chats // 2 + 1
+    queries = gateway_queries(-chat, f"bench-{chat}-{args.polls_per_chat // 2 + 1}")
+
+    try:
+        async with engine.connect() as connection:
+            print(
+                f"Заполняем {args.chats} чатов: {args.polls_per_chat} опросов и "
+                f"{args.lines_per_chat} строк кода на чат..."
+            )
+            await prepare(connection, args)
+            before = await measure(connection, queries, args.repeat)
+
+            for create, _ in INDEXES:
+                await connection.execute(text(create))
+            await connection.commit()
+            after = await measure(connection, queries, args.repeat)
+
+            await connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            await connection.commit()
+    finally:
+        await engine.dispose()
+
+    header = f"{'query':<26} | {'before ms':>10} | {'after ms':>10} | {'speedup':>8}"
+    print(f"\n{header}\n{'-' * len(header)}")
+    for name in queries:
+        total_before = before[name]["time_ms"] + before[name]["triggers_ms"]
+        total_after = after[name]["time_ms"] + after[name]["triggers_ms"]
+        print(
+            f"{name:<26} | {total_before:>10.3f} | {total_after:>10.3f} | "
+            f"{_speedup(total_before, total_after):>8}"
+        )
+    for name in queries:
+        print(f"\n{name}:")
+        print(f"  до:    {', '.join(before[name]['scans'])}")
+        print(f"  после: {', '.join(after[name]['scans'])}")
+
+    report = {
+        "benchmark": "query_plans",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": {name: {"before": before[name], "after": after[name]} for name in queries},
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.output}")
+
+
+def _speedup(before: float, after: float) -> str:
+    return f"x{before / after:.1f}" if after else "—"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--polls-per-chat", type=int, default=50)
+    parser.add_argument("--lines-per-chat", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5, help="прогонов каждого запроса")
+    parser.add_argument("--output", help="файл для JSON-отчёта")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,9 @@ class PollNotFoundException(Exception):
 class PollAlreadyExistException(Exception):
     def __init__(self):
         super().__init__("Poll already exist")
+
+
+class PollOptionsUnavailableException(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Poll options are temporarily unavailable")
+        self.retry_after = retry_after
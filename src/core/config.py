@@ -12,6 +12,9 @@ class Settings:
         self.PG_DATABASE = os.getenv("PG_DATABASE")
         self.PG_USERNAME = os.getenv("PG_USERNAME")
         self.PG_PASSWORD = os.getenv("PG_PASSWORD")
+        self.PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", 30))
+        self.PG_MAX_OVERFLOW = int(os.getenv("PG_MAX_OVERFLOW", 50))
+        self.PG_POOL_TIMEOUT = int(os.getenv("PG_POOL_TIMEOUT", 10))
 
         # Redis Settings
         self.REDIS_HOST = os.getenv("REDIS_HOST")
@@ -20,18 +23,68 @@ class Settings:
         self.REDIS_USERNAME = os.getenv("REDIS_USERNAME")
         self.REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
 
+        # Logging Settings
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+        self.LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
+        # Metrics Settings
+        self.METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+        self.METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+        self.TRACE_SLOW_THRESHOLD = float(os.getenv("TRACE_SLOW_THRESHOLD", 5.0))
+        self.TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", 20))
+
         # Telegram Settings
         self.BOT_TOKEN = os.getenv("BOT_TOKEN")
+        self.BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+        self.WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+        self.WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+        self.WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+        self.WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+        self.WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+        self.WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 1))
+        self.WEBHOOK_DRAIN_TIMEOUT = int(os.getenv("WEBHOOK_DRAIN_TIMEOUT", 30))
+        self.ADMIN_CACHE_TTL = int(os.getenv("ADMIN_CACHE_TTL", 600))
+        self.ADMIN_CACHE_LOCAL_TTL = int(os.getenv("ADMIN_CACHE_LOCAL_TTL", 30))
+        self.TG_GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", 25))
+        self.TG_CHAT_RATE = float(os.getenv("TG_CHAT_RATE", 1))
+        self.TG_GROUP_RATE = float(os.getenv("TG_GROUP_RATE", 0.33))
+        self.TG_CHAT_BURST = int(os.getenv("TG_CHAT_BURST", 3))
+        self.TG_MAX_RETRIES = int(os.getenv("TG_MAX_RETRIES", 3))
 
         # AI Settings
         self.LLM_PROXY_API_KEY = os.getenv("LLM_PROXY_API_KEY")
         self.LLM_PROXY_BASE_URL = os.getenv("LLM_PROXY_BASE_URL")
         self.LLM_REQUEST_TIMEOUT = int(os.getenv("LLM_REQUEST_TIMEOUT"))
         self.LLM_MODEL = os.getenv("LLM_MODEL")
+        self.LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", 10))
+        self.LLM_KEEPALIVE_TIMEOUT = int(os.getenv("LLM_KEEPALIVE_TIMEOUT", 60))
+        self.LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 86400))
+        self.LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+        self.LLM_CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", 1500))
+        self.LLM_CONTEXT_TAIL_LINES = int(os.getenv("LLM_CONTEXT_TAIL_LINES", 20))
+        self.LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+        self.LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 1.0))
+        self.LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 30.0))
+        self.LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", 5))
+        self.LLM_CIRCUIT_RESET_TIMEOUT = int(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", 60))
 
         # Poll Settings
         self.POLL_TTL = int(os.getenv("POLL_TTL"))
+        self.POLL_VOTES_TTL = int(os.getenv("POLL_VOTES_TTL", 86400))
+        self.VOTE_BATCH_WINDOW_MS = int(os.getenv("VOTE_BATCH_WINDOW_MS", 5))
+        self.VOTE_BATCH_MAX_SIZE = int(os.getenv("VOTE_BATCH_MAX_SIZE", 500))
+        self.CODE_CACHE_TTL = int(os.getenv("CODE_CACHE_TTL", 86400))
         self.WORKER_CHECK_INTERVAL = int(os.getenv("WORKER_CHECK_INTERVAL"))
+        self.WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 10))
+        self.WORKER_CHAT_TIMEOUT = int(os.getenv("WORKER_CHAT_TIMEOUT", 120))
+        self.WORKER_MAX_SLEEP = int(os.getenv("WORKER_MAX_SLEEP", 300))
+        self.WORKER_LEASE_TTL = int(os.getenv("WORKER_LEASE_TTL", 60))
+
+        # Speculative Generation Settings
+        self.SPECULATIVE_BUDGET = int(os.getenv("SPECULATIVE_BUDGET", 0))
+        self.SPECULATIVE_LEAD_TIME = int(os.getenv("SPECULATIVE_LEAD_TIME", 30))
 
 
 config = Settings()
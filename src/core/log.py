@@ -1,13 +1,125 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import re
 from collections import deque
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timedelta, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, Deque, Dict, List, Optional, Pattern, Tuple
 
+from src.core.config import config
 from src.utils.path_resolve import find_project_root_by_src
 
 
 LOG_FILE = "bot.log"
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+TAIL_BLOCK_SIZE = 64 * 1024
+SINCE_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    def __init__(self, rules: Dict[str, float], root_dir: Path):
+        super().__init__()
+        self.rules = rules
+        self.root_dir = str(root_dir)
+        self._rates: Dict[str, Optional[float]] = {}
+
+    def _source(self, record: logging.LogRecord) -> str:
+        # Код бота пишет в корневой логгер, поэтому для него источник — путь модуля
+        if record.name != "root":
+            return record.name
+        path = os.path.relpath(os.path.splitext(record.pathname)[0], self.root_dir)
+        return path.replace(os.sep, ".")
+
+    def _rate(self, source: str) -> Optional[float]:
+        if source not in self._rates:
+            matches = [
+                prefix
+                for prefix in self.rules
+                if source == prefix or source.startswith(f"{prefix}.")
+            ]
+            self._rates[source] = self.rules[max(matches, key=len)] if matches else None
+        return self._rates[source]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(self._source(record))
+        return rate is None or random.random() < rate
+
+
+class StructuredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение собирается в потоке вызова, а трейсбек сохраняется в exc_text,
+        # чтобы JSON-форматтер в потоке слушателя мог вынести его в отдельное поле
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def parse_sampling_rules(raw: str) -> Dict[str, float]:
+    rules = {}
+    for rule in raw.split(","):
+        source, _, rate = rule.strip().partition("=")
+        if source and rate:
+            rules[source.strip()] = min(1.0, max(0.0, float(rate)))
+    return rules
+
+
+_listener: Optional[QueueListener] = None
+_listener_started = False
+
+
+def _start_listener(listener: QueueListener):
+    global _listener, _listener_started
+    _listener = listener
+    _listener.start()
+    _listener_started = True
+
+
+def _restart_listener():
+    # Перед fork слушатель останавливается и дописывает очередь, чтобы дочерний процесс
+    # не получил её копию с уже записанными сообщениями; затем каждый процесс запускает
+    # своего слушателя над той же очередью и обработчиками
+    _start_listener(
+        QueueListener(
+            _listener.queue,
+            *_listener.handlers,
+            respect_handler_level=_listener.respect_handler_level,
+        )
+    )
+
+
+def stop_logging():
+    global _listener_started
+    if _listener_started:
+        _listener.stop()
+        _listener_started = False
 
 
 def setup_logging() -> logging.Logger:
@@ -16,14 +128,11 @@ def setup_logging() -> logging.Logger:
     logs_dir.mkdir(exist_ok=True)
     log_path = logs_dir / LOG_FILE
 
-    log_format = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    formatter = JsonFormatter() if config.LOG_FORMAT == "json" else logging.Formatter(LOG_FORMAT)
 
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter(log_format))
+    console_handler.setLevel(config.LOG_LEVEL)
+    console_handler.setFormatter(formatter)
 
     file_handler = RotatingFileHandler(
         log_path,
@@ -31,11 +140,28 @@ def setup_logging() -> logging.Logger:
         backupCount=3,
         encoding="utf-8",
     )
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(logging.Formatter(log_format))
+    file_handler.setLevel(config.LOG_LEVEL)
+    file_handler.setFormatter(formatter)
+
+    # Запись в файл и ротация выполняются в отдельном потоке, event loop только кладёт
+    # подготовленные записи в очередь
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    sampling_rules = parse_sampling_rules(config.LOG_SAMPLING)
+    if sampling_rules:
+        queue_handler.addFilter(SamplingFilter(sampling_rules, root_dir))
+
+    _start_listener(
+        QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    )
+    atexit.register(stop_logging)
+    os.register_at_fork(
+        before=stop_logging, after_in_parent=_restart_listener, after_in_child=_restart_listener
+    )
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    logger = logging.getLogger()
+    logger.setLevel(config.LOG_LEVEL)
+    logger.addHandler(queue_handler)
 
     return logger
 
@@ -48,22 +174,130 @@ def get_log_file_path() -> Path:
     return root_dir / "logs" / LOG_FILE
 
 
+def get_log_files(log_path: Path) -> List[Path]:
+    backups = []
+    for path in log_path.parent.glob(f"{log_path.name}.*"):
+        suffix = path.suffix[1:]
+        if suffix.isdigit():
+            backups.append((int(suffix), path))
+    files = [path for _, path in sorted(backups, reverse=True)]
+    if log_path.exists():
+        files.append(log_path)
+    return files
+
+
+def _tail_file(path: Path, n: int) -> List[str]:
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        chunks = []
+        newlines = 0
+        while position > 0 and newlines <= n:
+            size = min(TAIL_BLOCK_SIZE, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    lines = b"".join(reversed(chunks)).decode("utf-8", errors="replace").splitlines()
+    return lines[-n:]
+
+
 def read_last_n_lines(filepath: Path, n: int = 100) -> List[str]:
-    if not filepath.exists():
+    files = get_log_files(filepath)
+    if not files:
         return [f"⚠️ Лог-файл не найден: {filepath}"]
 
     try:
-        with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-            return list(deque(f, maxlen=n))
+        lines: List[str] = []
+        for path in reversed(files):
+            lines = _tail_file(path, n - len(lines)) + lines
+            if len(lines) >= n:
+                break
+        return lines
     except Exception as e:
         return [f"❌ Ошибка чтения лога: {e}"]
 
 
-def read_full_log(filepath: Path) -> str:
+def read_log_head(filepath: Path, limit: int) -> str:
     if not filepath.exists():
         return f"⚠️ Лог-файл не найден: {filepath}"
     try:
         with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
+            return f.read(limit)
     except Exception as e:
         return f"❌ Ошибка чтения лога: {e}"
+
+
+def parse_since(value: str) -> Optional[datetime]:
+    relative = re.fullmatch(r"(\d+)([smhd])", value.strip().lower())
+    if relative:
+        amount, unit = relative.groups()
+        return datetime.now(timezone.utc) - timedelta(**{SINCE_UNITS[unit]: int(amount)})
+    try:
+        since = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    return since if since.tzinfo else since.astimezone()
+
+
+def _line_time(line: str) -> Optional[datetime]:
+    try:
+        if line.startswith('{"time": "'):
+            return datetime.fromisoformat(line.split('"', 4)[3])
+        if len(line) >= 23 and line[4] == "-" and line[10] == " ":
+            return datetime.strptime(line[:23], "%Y-%m-%d %H:%M:%S,%f").astimezone()
+    except ValueError:
+        pass
+    return None
+
+
+def _next_line_time(f: BinaryIO) -> Optional[datetime]:
+    for raw_line in f:
+        line_time = _line_time(raw_line.decode("utf-8", errors="replace"))
+        if line_time is not None:
+            return line_time
+    return None
+
+
+def _seek_since(f: BinaryIO, since: datetime):
+    # Записи в файле идут по времени, поэтому начало диапазона ищем бинарным поиском
+    # по смещению, а не чтением файла с начала
+    low, high = 0, f.seek(0, os.SEEK_END)
+    while high - low > TAIL_BLOCK_SIZE:
+        middle = (low + high) // 2
+        f.seek(middle)
+        f.readline()
+        line_time = _next_line_time(f)
+        if line_time is None or line_time >= since:
+            high = middle
+        else:
+            low = middle
+    f.seek(low)
+    if low:
+        f.readline()
+
+
+def search_logs(
+    filepath: Path, pattern: Pattern, since: Optional[datetime] = None, limit: int = 200
+) -> Tuple[List[str], int]:
+    matches: Deque[str] = deque(maxlen=limit)
+    total = 0
+    for path in get_log_files(filepath):
+        if since is not None and datetime.fromtimestamp(path.stat().st_mtime).astimezone() < since:
+            continue
+
+        with open(path, "rb") as f:
+            in_range = since is None
+            if not in_range:
+                _seek_since(f, since)
+            for raw_line in f:
+                line = raw_line.decode("utf-8", errors="replace").rstrip("\n")
+                if not in_range:
+                    line_time = _line_time(line)
+                    if line_time is None or line_time < since:
+                        continue
+                    in_range = True
+                if pattern.search(line):
+                    matches.append(line)
+                    total += 1
+    return list(matches), total
@@ -0,0 +1,247 @@
+import bisect
+import functools
+import inspect
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from logging import Logger
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+from src.core.config import Settings
+from src.core.tracing import span
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        pass
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in self._values.items():
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[Sample]:
+        for key, (counts, total, count) in self._values.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def samples(self) -> Iterator[Sample]:
+        yield self.name, {}, float(self.function())
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, function: Callable[[], float]) -> Gauge:
+        return self._register(Gauge(name, documentation, function))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                continue
+            for name, labels, value in samples:
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                    name = f"{name}{{{rendered}}}"
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+llm_requests = metrics.counter("llm_requests_total", "Запросы к LLM по результату", ("result",))
+llm_request_duration = metrics.histogram(
+    "llm_request_duration_seconds", "Длительность запросов к LLM", ("result",)
+)
+db_query_duration = metrics.histogram(
+    "db_query_duration_seconds", "Длительность запросов шлюзов Postgres", ("gateway", "method")
+)
+db_query_errors = metrics.counter(
+    "db_query_errors_total", "Ошибки запросов шлюзов Postgres", ("gateway", "method")
+)
+redis_operation_duration = metrics.histogram(
+    "redis_operation_duration_seconds",
+    "Длительность операций хранилищ Redis",
+    ("storage", "operation"),
+)
+redis_operation_errors = metrics.counter(
+    "redis_operation_errors_total", "Ошибки операций хранилищ Redis", ("storage", "operation")
+)
+telegram_request_duration = metrics.histogram(
+    "telegram_request_duration_seconds", "Длительность запросов к Bot API", ("method",)
+)
+telegram_requests = metrics.counter(
+    "telegram_requests_total", "Запросы к Bot API по результату", ("method", "result")
+)
+poll_cycle_stage_duration = metrics.histogram(
+    "poll_cycle_stage_duration_seconds", "Длительность этапов смены опроса", ("stage",)
+)
+poll_cycles = metrics.counter("poll_cycles_total", "Смены опроса по результату", ("result",))
+
+
+def instrument_methods(histogram: Histogram, errors: Counter):
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or not inspect.iscoroutinefunction(method):
+                continue
+            labels = dict(zip(histogram.labelnames, (cls.__name__, name)))
+            setattr(cls, name, _timed(method, histogram, errors, labels, f"{cls.__name__}.{name}"))
+        return cls
+
+    return decorate
+
+
+def _timed(method, histogram: Histogram, errors: Counter, labels: Dict[str, str], span_name: str):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span(span_name):
+                return await method(*args, **kwargs)
+        except Exception:
+            errors.inc(**labels)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started, **labels)
+
+    return wrapper
+
+
+class MetricsServer:
+    def __init__(self, config: Settings, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self):
+        if not self.config.METRICS_PORT:
+            return
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.config.METRICS_HOST, self.config.METRICS_PORT).start()
+        self.logger.info(
+            f"📈 Метрики доступны на http://{self.config.METRICS_HOST}:"
+            f"{self.config.METRICS_PORT}/metrics"
+        )
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=metrics.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -4,14 +4,35 @@ from dishka import Provider, Scope, provide
 from redis import Redis
 from src.core.config import Settings
 from src.infrastructure.redis.connection import async_redis_client
+from src.infrastructure.redis.storages.admin import AdminCacheStorage
+from src.infrastructure.redis.storages.code import CodeCacheStorage
+from src.infrastructure.redis.storages.llm_cache import LLMCacheStorage
 from src.infrastructure.redis.storages.poll import PollStorage
 
 
 class CacheProvider(Provider):
-    @provide(scope=Scope.REQUEST)
+    @provide(scope=Scope.APP)
     def get_connection(self) -> Redis:
         return async_redis_client
 
-    @provide(scope=Scope.REQUEST)
+    @provide(scope=Scope.APP)
+    def admin_cache_storage(
+        self, redis_client: Redis, logger: Logger, config: Settings
+    ) -> AdminCacheStorage:
+        return AdminCacheStorage(redis_client, logger, config)
+
+    @provide(scope=Scope.APP)
+    def llm_cache_storage(
+        self, redis_client: Redis, logger: Logger, config: Settings
+    ) -> LLMCacheStorage:
+        return LLMCacheStorage(redis_client, logger, config)
+
+    @provide(scope=Scope.APP)
+    def code_cache_storage(
+        self, redis_client: Redis, logger: Logger, config: Settings
+    ) -> CodeCacheStorage:
+        return CodeCacheStorage(redis_client, logger, config)
+
+    @provide(scope=Scope.APP)
     def poll_storage(self, redis_client: Redis, logger: Logger, config: Settings) -> PollStorage:
         return PollStorage(redis_client, logger, config)
@@ -1,5 +1,9 @@
+from logging import Logger
+
 from dishka import Provider, Scope, provide
 from src.infrastructure.postgres.repositories.chat import ChatDBGateWay
+from src.infrastructure.redis.storages.admin import AdminCacheStorage
+from src.services.admin import AdminService
 from src.services.chat import ChatService
 
 
@@ -7,3 +11,7 @@ class ChatProvider(Provider):
     @provide(scope=Scope.REQUEST)
     def chat_service(self, chat_gateway: ChatDBGateWay) -> ChatService:
         return ChatService(chat_gateway=chat_gateway)
+
+    @provide(scope=Scope.APP)
+    def admin_service(self, admin_cache: AdminCacheStorage, logger: Logger) -> AdminService:
+        return AdminService(admin_cache, logger)
@@ -1,8 +1,8 @@
 from dishka import Provider, Scope, provide
-from src.core.config import Settings
+from src.core.config import Settings, config
 
 
 class ConfigProvider(Provider):
-    @provide(scope=Scope.REQUEST)
-    async def get_config(self) -> Settings:
-        return Settings()
+    @provide(scope=Scope.APP)
+    def get_config(self) -> Settings:
+        return config
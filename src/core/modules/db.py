@@ -1,12 +1,7 @@
 from typing import AsyncGenerator
 
 from dishka import Provider, Scope, provide
-from sqlalchemy.engine.url import URL
-from sqlalchemy.ext.asyncio import (
-    AsyncSession,
-    async_sessionmaker,
-    create_async_engine,
-)
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from src.infrastructure.postgres.repositories.chat import ChatDBGateWay
 from src.infrastructure.postgres.repositories.code_line import CodeLineDBGateWay
 from src.infrastructure.postgres.repositories.poll import PollDBGateWay
@@ -14,27 +9,18 @@ from src.infrastructure.postgres.repositories.poll_option import PollOptionDBGat
 
 
 class DBProvider(Provider):
-    def __init__(self, url: URL):
+    def __init__(self, engine: AsyncEngine, session_maker: async_sessionmaker[AsyncSession]):
         super().__init__()
+        self.engine = engine
+        self.session_maker = session_maker
 
-        self.DATABASE_URL = url
-        self.SQLALCHEMY_CONNECT_ARGS = {
-            "prepared_statement_cache_size": 500,
-        }
+    @provide(scope=Scope.APP)
+    def get_engine(self) -> AsyncEngine:
+        return self.engine
 
-    @provide(scope=Scope.REQUEST)
-    async def get_connection(self) -> async_sessionmaker[AsyncSession]:
-        engine = create_async_engine(
-            self.DATABASE_URL,
-            connect_args=self.SQLALCHEMY_CONNECT_ARGS,
-            pool_size=30,
-            max_overflow=50,
-            pool_timeout=10,
-            pool_recycle=1800,
-            pool_pre_ping=True,
-        )
-
-        return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    @provide(scope=Scope.APP)
+    def get_connection(self) -> async_sessionmaker[AsyncSession]:
+        return self.session_maker
 
     @provide(scope=Scope.REQUEST)
     async def db_session(
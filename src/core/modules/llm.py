@@ -1,11 +1,18 @@
-from logging import Logger
-
 from dishka import Provider, Scope, provide
-from src.core.config import Settings
 from src.external.llm.proxy_api import ProxyAPI
+from src.services.option_generator import PollOptionsGenerator
 
 
 class LLMProvider(Provider):
-    @provide(scope=Scope.REQUEST)
-    async def get_llm(self, config: Settings, logger: Logger) -> ProxyAPI:
-        return ProxyAPI(config, logger)
+    def __init__(self, llm: ProxyAPI, poll_options_generator: PollOptionsGenerator):
+        super().__init__()
+        self.llm = llm
+        self.poll_options_generator = poll_options_generator
+
+    @provide(scope=Scope.APP)
+    def get_llm(self) -> ProxyAPI:
+        return self.llm
+
+    @provide(scope=Scope.APP)
+    def get_poll_options_generator(self) -> PollOptionsGenerator:
+        return self.poll_options_generator
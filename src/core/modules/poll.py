@@ -1,20 +1,24 @@
 from logging import Logger
 
 from dishka import Provider, Scope, provide
-from src.external.llm.proxy_api import ProxyAPI
 from src.infrastructure.postgres.repositories.poll import PollDBGateWay
 from src.infrastructure.postgres.repositories.poll_option import PollOptionDBGateWay
 from src.infrastructure.redis.storages.poll import PollStorage
 from src.services.code_line import CodeLineService
+from src.services.option_generator import PollOptionsGenerator
 from src.services.poll import PollService
 from src.services.poll_option import PollOptionService
+from src.services.speculation import PollSpeculator
+from src.services.vote_buffer import VoteBuffer
 from src.worker.poll import PollWorker
 
 
 class PollProvider(Provider):
-    def __init__(self, worker: PollWorker):
+    def __init__(self, worker: PollWorker, speculator: PollSpeculator, vote_buffer: VoteBuffer):
         super().__init__()
         self.worker = worker
+        self.speculator = speculator
+        self.vote_buffer = vote_buffer
 
     @provide(scope=Scope.REQUEST)
     def poll_service(
@@ -23,11 +27,18 @@ class PollProvider(Provider):
         poll_storage: PollStorage,
         poll_option_service: PollOptionService,
         code_line_service: CodeLineService,
-        llm: ProxyAPI,
+        poll_options_generator: PollOptionsGenerator,
+        poll_speculator: PollSpeculator,
         logger: Logger,
     ) -> PollService:
         return PollService(
-            poll_gateway, poll_storage, poll_option_service, code_line_service, llm, logger
+            poll_gateway,
+            poll_storage,
+            poll_option_service,
+            code_line_service,
+            poll_options_generator,
+            poll_speculator,
+            logger,
         )
 
     @provide(scope=Scope.REQUEST)
@@ -39,3 +50,11 @@ class PollProvider(Provider):
     @provide(scope=Scope.APP)
     def poll_worker(self) -> PollWorker:
         return self.worker
+
+    @provide(scope=Scope.APP)
+    def poll_speculator(self) -> PollSpeculator:
+        return self.speculator
+
+    @provide(scope=Scope.APP)
+    def get_vote_buffer(self) -> VoteBuffer:
+        return self.vote_buffer
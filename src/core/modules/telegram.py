@@ -0,0 +1,12 @@
+from dishka import Provider, Scope, provide
+from src.external.telegram.rate_limiter import OutboundRateLimiter
+
+
+class TelegramProvider(Provider):
+    def __init__(self, rate_limiter: OutboundRateLimiter):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+
+    @provide(scope=Scope.APP)
+    def get_rate_limiter(self) -> OutboundRateLimiter:
+        return self.rate_limiter
@@ -0,0 +1,116 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Iterator, List, Optional
+
+from src.core.config import config
+
+
+MAX_SPANS_PER_TRACE = 500
+
+
+class Span:
+    __slots__ = ("name", "depth", "start", "duration", "error")
+
+    def __init__(self, name: str, depth: int, start: float):
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class Trace:
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.duration is not None
+
+    def start_span(self, name: str, depth: int) -> Optional[Span]:
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped_spans += 1
+            return None
+        span = Span(name, depth, time.perf_counter() - self.origin)
+        self.spans.append(span)
+        return span
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.origin
+
+
+class SlowTraceBuffer:
+    def __init__(self, threshold: float, size: int):
+        self.threshold = threshold
+        self._traces: Deque[Trace] = deque(maxlen=size)
+
+    def record(self, trace: Trace):
+        if trace.duration >= self.threshold:
+            self._traces.append(trace)
+
+    def get_traces(self) -> List[Trace]:
+        return list(reversed(self._traces))
+
+    def clear(self):
+        self._traces.clear()
+
+
+slow_traces = SlowTraceBuffer(config.TRACE_SLOW_THRESHOLD, config.TRACE_BUFFER_SIZE)
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_depth: ContextVar[int] = ContextVar("current_span_depth", default=0)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    trace = _current_trace.get()
+    # Фоновые задачи наследуют контекст и могут пережить свой цикл — их не пишем
+    if trace is None or trace.finished:
+        yield
+        return
+
+    depth = _current_depth.get()
+    record = trace.start_span(name, depth)
+    token = _current_depth.set(depth + 1)
+    try:
+        yield
+    except BaseException as e:
+        if record is not None:
+            record.error = type(e).__name__
+        raise
+    finally:
+        _current_depth.reset(token)
+        if record is not None:
+            record.duration = time.perf_counter() - trace.origin - record.start
+
+
+@contextmanager
+def trace(name: str, **attributes) -> Iterator[None]:
+    parent = _current_trace.get()
+    if parent is not None and not parent.finished:
+        with span(name):
+            yield
+        return
+
+    current = Trace(name, attributes)
+    trace_token = _current_trace.set(current)
+    depth_token = _current_depth.set(0)
+    try:
+        yield
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _current_depth.reset(depth_token)
+        _current_trace.reset(trace_token)
+        current.finish()
+        slow_traces.record(current)
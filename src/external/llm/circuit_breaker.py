@@ -0,0 +1,70 @@
+import time
+from logging import Logger
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, logger: Logger):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.logger = logger
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self.retry_after() == 0:
+            return self.HALF_OPEN
+        return self._state
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN or (self.state == self.HALF_OPEN and self._trial_in_progress)
+
+    def retry_after(self) -> float:
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            self.logger.info("🟢 Circuit breaker LLM закрыт, запросы восстановлены")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_progress = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._trial_in_progress or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN or self._trial_in_progress:
+                self.logger.warning(
+                    f"🔴 Circuit breaker LLM открыт после {self._failures} ошибок подряд "
+                    f"на {self.reset_timeout} сек"
+                )
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._trial_in_progress = False
+
+    def record_cancelled(self):
+        # Отмена ничего не говорит о здоровье LLM: только освобождаем пробный запрос
+        self._trial_in_progress = False
+
+    def get_status(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "retry_after": round(self.retry_after(), 1),
+        }
@@ -0,0 +1,152 @@
+import ast
+from typing import Dict, List, Optional, Set
+
+
+ELIDED_MARKER = "# ..."
+BLOCK_KEYWORDS = (
+    "def ",
+    "async def ",
+    "class ",
+    "if ",
+    "elif ",
+    "else",
+    "for ",
+    "async for ",
+    "while ",
+    "try",
+    "except",
+    "finally",
+    "with ",
+    "async with ",
+    "match ",
+    "case ",
+)
+DEFINITION_NODES = (
+    ast.Import,
+    ast.ImportFrom,
+    ast.FunctionDef,
+    ast.AsyncFunctionDef,
+    ast.ClassDef,
+)
+
+
+def estimate_tokens(code_lines: List[str]) -> int:
+    return sum(len(line) for line in code_lines) // 4 + len(code_lines)
+
+
+def _indent(line: str) -> int:
+    return len(line.expandtabs(4)) - len(line.expandtabs(4).lstrip())
+
+
+def _is_block_header(stripped: str) -> bool:
+    return stripped.endswith(":") and stripped.startswith(BLOCK_KEYWORDS)
+
+
+def _parse_statement(stripped: str) -> Optional[ast.stmt]:
+    source = f"{stripped}\n    pass" if stripped.endswith(":") else stripped
+    try:
+        module = ast.parse(source)
+    except SyntaxError:
+        return None
+    return module.body[0] if module.body else None
+
+
+def _defined_names(statement: Optional[ast.stmt]) -> Set[str]:
+    if isinstance(statement, (ast.Import, ast.ImportFrom)):
+        return {(alias.asname or alias.name).split(".")[0] for alias in statement.names}
+    if isinstance(statement, DEFINITION_NODES):
+        return {statement.name}
+    if isinstance(statement, ast.Assign):
+        targets = statement.targets
+    elif isinstance(statement, (ast.AnnAssign, ast.AugAssign)):
+        targets = [statement.target]
+    else:
+        return set()
+    return {
+        node.id for target in targets for node in ast.walk(target) if isinstance(node, ast.Name)
+    }
+
+
+def _enclosing_headers(code_lines: List[str], position: int) -> Set[int]:
+    headers: Set[int] = set()
+    if position >= len(code_lines):
+        return headers
+
+    current_indent = _indent(code_lines[position])
+    for index in range(position - 1, -1, -1):
+        if current_indent == 0:
+            break
+        stripped = code_lines[index].strip()
+        if stripped and _is_block_header(stripped) and _indent(code_lines[index]) < current_indent:
+            headers.add(index)
+            current_indent = _indent(code_lines[index])
+    return headers
+
+
+def build_prompt_context(code_lines: List[str], token_budget: int, tail_lines: int) -> List[str]:
+    if token_budget <= 0 or estimate_tokens(code_lines) <= token_budget:
+        return list(code_lines)
+
+    split = max(0, len(code_lines) - tail_lines)
+    tail = code_lines[split:]
+    enclosing = _enclosing_headers(code_lines, split)
+
+    seen_names: Set[str] = set()
+    kept: Dict[int, str] = {}
+    assignments: List[int] = []
+    definitions: List[int] = []
+    imports: List[int] = []
+    for index, line in enumerate(code_lines[:split]):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        statement = _parse_statement(stripped)
+        names = _defined_names(statement)
+        if index in enclosing:
+            kept[index] = line
+        elif isinstance(statement, (ast.Import, ast.ImportFrom)):
+            kept[index] = line
+            imports.append(index)
+        elif isinstance(statement, DEFINITION_NODES):
+            kept[index] = line
+            definitions.append(index)
+        elif names - seen_names:
+            kept[index] = line
+            assignments.append(index)
+        seen_names |= names
+
+    # Если сводка не влезает в бюджет, сначала жертвуем старыми присваиваниями,
+    # затем определениями и импортами. Объемлющие блоки и хвост остаются всегда.
+    droppable = assignments + definitions + imports
+    low, high = 0, len(droppable)
+    while low < high:
+        middle = (low + high) // 2
+        context = _assemble(code_lines, split, _without(kept, droppable[:middle]), tail)
+        if estimate_tokens(context) <= token_budget:
+            high = middle
+        else:
+            low = middle + 1
+    return _assemble(code_lines, split, _without(kept, droppable[:low]), tail)
+
+
+def _without(kept: Dict[int, str], dropped: List[int]) -> Dict[int, str]:
+    dropped_indexes = set(dropped)
+    return {index: line for index, line in kept.items() if index not in dropped_indexes}
+
+
+def _assemble(
+    code_lines: List[str], split: int, kept: Dict[int, str], tail: List[str]
+) -> List[str]:
+    context = []
+    elided_indent = None
+    for index in range(split):
+        if index in kept:
+            if elided_indent is not None:
+                context.append(" " * elided_indent + ELIDED_MARKER)
+                elided_indent = None
+            context.append(kept[index])
+        elif code_lines[index].strip() and elided_indent is None:
+            elided_indent = _indent(code_lines[index])
+    if elided_indent is not None:
+        context.append(" " * elided_indent + ELIDED_MARKER)
+    return context + list(tail)
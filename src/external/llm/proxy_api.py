@@ -1,9 +1,14 @@
+import asyncio
 import json
+import time
 from logging import Logger
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
-import requests
+import aiohttp
 from src.core.config import Settings
+from src.core.metrics import llm_request_duration, llm_requests
+from src.core.tracing import span
+from src.external.llm.circuit_breaker import CircuitBreaker
 
 
 class ProxyAPI:
@@ -13,12 +18,73 @@ class ProxyAPI:
         self.model = config.LLM_MODEL
         self.timeout = config.LLM_REQUEST_TIMEOUT
         self.base_url = config.LLM_PROXY_BASE_URL
+        self.max_concurrent_requests = config.LLM_MAX_CONCURRENT_REQUESTS
+        self.keepalive_timeout = config.LLM_KEEPALIVE_TIMEOUT
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.circuit_breaker = CircuitBreaker(
+            config.LLM_CIRCUIT_FAILURE_THRESHOLD, config.LLM_CIRCUIT_RESET_TIMEOUT, logger
+        )
 
-    def send_message(self, message: str) -> Optional[List[str]]:
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrent_requests,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def send_message(
+        self,
+        message: str,
+        timeout: Optional[float] = None,
+        validate: Optional[Callable[[Any], bool]] = None,
+    ) -> Optional[List[str]]:
+        if not self.circuit_breaker.allow_request():
+            llm_requests.inc(result="circuit_open")
+            self.logger.warning(
+                f"🔴 Запрос к ProxyAPI пропущен: circuit breaker открыт "
+                f"(повтор через {self.circuit_breaker.retry_after():.0f} сек)"
+            )
+            return None
+
+        started = time.perf_counter()
+        try:
+            with span("llm.send_message"):
+                options = await self._send_message(message, timeout)
+        except asyncio.CancelledError:
+            self.circuit_breaker.record_cancelled()
+            self._observe("cancelled", started)
+            raise
+        if options is None or (validate is not None and not validate(options)):
+            self.circuit_breaker.record_failure()
+            self._observe("error" if options is None else "invalid", started)
+            return None
+
+        self.circuit_breaker.record_success()
+        self._observe("ok", started)
+        return options
+
+    @staticmethod
+    def _observe(result: str, started: float):
+        llm_requests.inc(result=result)
+        llm_request_duration.observe(time.perf_counter() - started, result=result)
+
+    async def _send_message(self, message: str, timeout: Optional[float]) -> Optional[List[str]]:
         try:
             payload = {
                 "model": self.model,  # твоя модель
@@ -30,11 +96,20 @@ class ProxyAPI:
             self.logger.debug(
                 f"Отправка запроса к ProxyAPI: {json.dumps(payload, ensure_ascii=False)[:100]}..."
             )
-            response = requests.post(
-                self.base_url, headers=self.headers, json=payload, timeout=self.timeout
-            )
-            response.raise_for_status()
-            response_data = response.json()
+            request_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+            async with self._semaphore:
+                session = self._get_session()
+                async with session.post(
+                    self.base_url, json=payload, timeout=request_timeout
+                ) as response:
+                    if response.status >= 400:
+                        self.logger.error(
+                            f"HTTP ошибка при запросе к ProxyAPI: {response.status} {response.reason}"
+                        )
+                        self.logger.error(f"Тело ответа с ошибкой: {await response.text()}")
+                        return None
+                    response_data = await response.json(content_type=None)
+
             self.logger.debug(
                 f"Получен ответ от ProxyAPI: {json.dumps(response_data, ensure_ascii=False)[:200]}..."
             )
@@ -50,12 +125,12 @@ class ProxyAPI:
             )
             return None
 
-        except requests.exceptions.HTTPError as e:
-            self.logger.error(f"HTTP ошибка при запросе к ProxyAPI: {str(e)}")
-            if e.response is not None:
-                self.logger.error(f"Тело ответа с ошибкой: {e.response.text}")
+        except asyncio.TimeoutError:
+            self.logger.error(
+                f"Превышено время ожидания ответа ProxyAPI ({timeout or self.timeout} сек)"
+            )
             return None
-        except requests.exceptions.RequestException as e:
+        except aiohttp.ClientError as e:
             self.logger.error(f"Ошибка сети при запросе к ProxyAPI: {str(e)}")
             return None
         except json.JSONDecodeError as e:
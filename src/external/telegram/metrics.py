@@ -0,0 +1,35 @@
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from src.core.metrics import telegram_request_duration, telegram_requests
+from src.core.tracing import span
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        method_name = type(method).__name__
+        started = time.perf_counter()
+        result = "error"
+        try:
+            with span(f"telegram.{method_name}"):
+                response = await make_request(bot, method)
+            result = "ok"
+            return response
+        except TelegramRetryAfter:
+            result = "retry_after"
+            raise
+        finally:
+            telegram_request_duration.observe(time.perf_counter() - started, method=method_name)
+            telegram_requests.inc(method=method_name, result=result)
@@ -0,0 +1,218 @@
+import asyncio
+import bisect
+import itertools
+import time
+from logging import Logger
+from typing import Dict, List, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendPoll, TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from src.core.config import Settings
+from src.core.tracing import span
+
+
+THROTTLED_METHOD_PREFIXES = ("Send", "Forward", "Copy")
+POLL_PRIORITY = 0
+DEFAULT_PRIORITY = 1
+MAX_IDLE_CHAT_BUCKETS = 10000
+
+ChatId = Union[int, str]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until: float):
+        self.blocked_until = max(self.blocked_until, until)
+
+    def is_idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.blocked_until
+
+
+class _Waiter:
+    def __init__(self, priority: int, sequence: int, chat_id: ChatId, future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.chat_id = chat_id
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class OutboundRateLimiter(BaseRequestMiddleware):
+    def __init__(self, config: Settings, logger: Logger):
+        self.logger = logger
+        self.chat_rate = config.TG_CHAT_RATE
+        self.group_rate = config.TG_GROUP_RATE
+        self.chat_burst = config.TG_CHAT_BURST
+        self.max_retries = config.TG_MAX_RETRIES
+        self.global_bucket = TokenBucket(config.TG_GLOBAL_RATE, config.TG_GLOBAL_RATE)
+        self._chat_buckets: Dict[ChatId, TokenBucket] = {}
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._stats = {
+            "sent": 0,
+            "throttled": 0,
+            "throttle_time": 0.0,
+            "max_throttle_time": 0.0,
+            "retry_after": 0,
+        }
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not type(method).__name__.startswith(THROTTLED_METHOD_PREFIXES):
+            return await make_request(bot, method)
+
+        priority = POLL_PRIORITY if isinstance(method, SendPoll) else DEFAULT_PRIORITY
+        for attempt in range(self.max_retries + 1):
+            with span("telegram.throttle"):
+                await self.acquire(chat_id, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self._stats["retry_after"] += 1
+                self._chat_bucket(chat_id).block(time.monotonic() + e.retry_after)
+                self._wakeup.set()
+                if attempt == self.max_retries:
+                    raise
+                self.logger.warning(
+                    f"🚦 Telegram ограничил отправку {type(method).__name__} в чат {chat_id}, "
+                    f"повтор через {e.retry_after} сек ({attempt + 1}/{self.max_retries})"
+                )
+
+    async def acquire(self, chat_id: ChatId, priority: int = DEFAULT_PRIORITY):
+        waiter = _Waiter(
+            priority, next(self._sequence), chat_id, asyncio.get_running_loop().create_future()
+        )
+        bisect.insort(self._waiters, waiter)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        self._wakeup.set()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        self._stats["sent"] += 1
+        if waited > 0.001:
+            self._stats["throttled"] += 1
+            self._stats["throttle_time"] += waited
+            self._stats["max_throttle_time"] = max(self._stats["max_throttle_time"], waited)
+
+    async def _dispatch_loop(self):
+        while self._waiters:
+            self._wakeup.clear()
+            now = time.monotonic()
+            wait = self.global_bucket.delay(now)
+            if wait == 0:
+                wait = None
+                for waiter in self._waiters:
+                    if waiter.future.done():
+                        continue
+                    chat_delay = self._chat_bucket(waiter.chat_id).delay(now)
+                    if chat_delay == 0:
+                        self._waiters.remove(waiter)
+                        self.global_bucket.consume(now)
+                        self._chat_bucket(waiter.chat_id).consume(now)
+                        waiter.future.set_result(None)
+                        # Задержка чата, упёршегося в лимит раньше в очереди, не должна
+                        # усыплять цикл: остальных готовых отпускаем следующим проходом
+                        wait = None
+                        break
+                    wait = chat_delay if wait is None else min(wait, chat_delay)
+                else:
+                    self._waiters = [waiter for waiter in self._waiters if not waiter.future.done()]
+                if wait is None:
+                    continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= MAX_IDLE_CHAT_BUCKETS:
+                now = time.monotonic()
+                self._chat_buckets = {
+                    key: value
+                    for key, value in self._chat_buckets.items()
+                    if not value.is_idle(now)
+                }
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if is_group else self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def share_between(self, workers: int):
+        # У каждого процесса своя копия лимитера, а лимиты Telegram общие на бота
+        self.chat_rate /= workers
+        self.group_rate /= workers
+        self.chat_burst = max(1.0, self.chat_burst / workers)
+        global_rate = self.global_bucket.rate / workers
+        self.global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self._chat_buckets.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "queue_depth": len(self._waiters),
+            "polls_queued": sum(1 for waiter in self._waiters if waiter.priority == POLL_PRIORITY),
+            "sent": self._stats["sent"],
+            "throttled": self._stats["throttled"],
+            "throttle_time": round(self._stats["throttle_time"], 3),
+            "max_throttle_time": round(self._stats["max_throttle_time"], 3),
+            "retry_after": self._stats["retry_after"],
+        }
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+        for waiter in self._waiters:
+            waiter.future.cancel()
+        self._waiters.clear()
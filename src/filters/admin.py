@@ -1,14 +1,17 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
+from dishka import AsyncContainer
+from src.services.admin import AdminService
 
 
 class AdminFilter(BaseFilter):
-    async def __call__(self, message: Message) -> bool:
+    async def __call__(self, message: Message, dishka_container: AsyncContainer) -> bool:
         if message.chat.type in ["group", "supergroup"]:
             try:
-                administrators = await message.bot.get_chat_administrators(message.chat.id)
-                admin_user_ids = [admin.user.id for admin in administrators]
-                return message.from_user.id in admin_user_ids
+                admin_service = await dishka_container.get(AdminService)
+                return await admin_service.is_admin(
+                    message.bot, message.chat.id, message.from_user.id
+                )
             except Exception:
                 return True
 
@@ -1,16 +1,20 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
+from dishka import AsyncContainer
+from src.services.admin import AdminService
 
 
 class AdminOrPrivateFilter(BaseFilter):
-    async def __call__(self, message: Message) -> bool:
+    async def __call__(self, message: Message, dishka_container: AsyncContainer) -> bool:
         if message.chat.type == "private":
             return True
 
         if message.chat.type in ["group", "supergroup"]:
             try:
-                admins = await message.bot.get_chat_administrators(message.chat.id)
-                return message.from_user.id in [a.user.id for a in admins]
+                admin_service = await dishka_container.get(AdminService)
+                return await admin_service.is_admin(
+                    message.bot, message.chat.id, message.from_user.id
+                )
             except Exception:
                 return False
 
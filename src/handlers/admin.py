@@ -1,20 +1,37 @@
 import asyncio
 import html
+import re
 import time
+from datetime import datetime
 from logging import Logger
-from typing import List
+from typing import List, Tuple
 
 from aiogram import Router
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.types import FSInputFile, Message
 from dishka import FromDishka
-from src.core.log import get_log_file_path, read_full_log, read_last_n_lines
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.core.log import (
+    get_log_file_path,
+    get_log_files,
+    parse_since,
+    read_last_n_lines,
+    read_log_head,
+    search_logs,
+)
+from src.core.tracing import Trace, slow_traces
+from src.external.llm.proxy_api import ProxyAPI
+from src.external.telegram.rate_limiter import OutboundRateLimiter
 from src.filters.admin_or_private import AdminOrPrivateFilter
+from src.infrastructure.redis.storages.llm_cache import LLMCacheStorage
 from src.infrastructure.redis.storages.poll import PollStorage
+from src.services.speculation import PollSpeculator
+from src.services.vote_buffer import VoteBuffer
 from src.worker.poll import PollWorker
 
 
 START_TIME = time.time()
+LOG_LINES_LIMIT = 100
 
 router = Router()
 
@@ -24,6 +41,12 @@ async def cmd_health(
     message: Message,
     poll_storage: FromDishka[PollStorage],
     poll_worker: FromDishka[PollWorker],
+    poll_speculator: FromDishka[PollSpeculator],
+    llm_cache: FromDishka[LLMCacheStorage],
+    llm: FromDishka[ProxyAPI],
+    db_engine: FromDishka[AsyncEngine],
+    rate_limiter: FromDishka[OutboundRateLimiter],
+    vote_buffer: FromDishka[VoteBuffer],
     logger: FromDishka[Logger],
 ):
     logger.info(f"Админ {message.from_user.id} запросил статус здоровья")
@@ -43,6 +66,22 @@ async def cmd_health(
             worker_str = (
                 f"✅ Работает (последняя проверка: {worker_status['last_check_ago']} сек назад)"
             )
+            if worker_status.get("active_workers") is not None:
+                worker_str += (
+                    f"\n🧩 <b>Реплик воркера:</b> {worker_status['active_workers']}, "
+                    f"в обработке у этой: {worker_status['in_flight']}"
+                )
+            if worker_status.get("next_deadline_in") is not None:
+                worker_str += (
+                    f"\n⏳ <b>До следующего опроса:</b> {worker_status['next_deadline_in']} сек"
+                )
+            last_tick = worker_status.get("last_tick")
+            if last_tick:
+                worker_str += (
+                    f"\n📈 <b>Последний тик:</b> {last_tick['chats']} чатов, "
+                    f"{last_tick['throughput']} чатов/сек, ошибок {last_tick['failed']}, "
+                    f"задержка ср. {last_tick['avg_lag']} сек / макс. {last_tick['max_lag']} сек"
+                )
         else:
             worker_str = "✅ Работает (ещё не проверял опросы)"
     else:
@@ -55,19 +94,122 @@ async def cmd_health(
         f"📊 <b>Активных опросов:</b> {active_count}\n"
     )
 
+    try:
+        cache_stats = await llm_cache.get_stats()
+        cache_hit_rate = (
+            f"{cache_stats['hit_rate'] * 100:.0f}%" if cache_stats["hit_rate"] is not None else "—"
+        )
+        response += (
+            f"💾 <b>Кэш LLM:</b> {cache_stats['entries']} записей, попаданий {cache_stats['hits']}, "
+            f"промахов {cache_stats['misses']} ({cache_hit_rate}), "
+            f"вытеснено {cache_stats['evictions']}\n"
+        )
+    except Exception as e:
+        logger.error(f"❌ Ошибка получения статистики кэша LLM: {str(e)}")
+
+    pool = db_engine.sync_engine.pool
+    if hasattr(pool, "get_stats"):
+        pool_stats = pool.get_stats()
+        response += (
+            f"🗄 <b>Пул Postgres:</b> занято {pool_stats['checked_out']} "
+            f"(пул {pool_stats['size']}, overflow {pool_stats['overflow']}/"
+            f"{pool_stats['max_overflow']}), ожидание ср. {pool_stats['avg_wait_ms']} мс / "
+            f"макс. {pool_stats['max_wait_ms']} мс, таймаутов {pool_stats['timeouts']}\n"
+        )
+
+    circuit = llm.circuit_breaker.get_status()
+    circuit_str = {"closed": "✅ закрыт", "open": "🔴 открыт", "half_open": "🟡 пробный запрос"}[
+        circuit["state"]
+    ]
+    if circuit["state"] == "open":
+        circuit_str += f", повтор через {circuit['retry_after']} сек"
+    response += f"⚡ <b>Circuit breaker LLM:</b> {circuit_str}\n"
+
+    throttling = rate_limiter.get_stats()
+    response += (
+        f"🚦 <b>Исходящие в Telegram:</b> в очереди {throttling['queue_depth']} "
+        f"(опросов {throttling['polls_queued']}), отправлено {throttling['sent']}, "
+        f"придержано {throttling['throttled']} на {throttling['throttle_time']} сек "
+        f"(макс. {throttling['max_throttle_time']} сек), 429: {throttling['retry_after']}\n"
+    )
+
+    votes = vote_buffer.get_stats()
+    if votes["batches"]:
+        response += (
+            f"🗳 <b>Буфер голосов:</b> принято {votes['votes']} (схлопнуто {votes['coalesced']}), "
+            f"пачек {votes['batches']}, размер ср. {votes['avg_batch']} / макс. "
+            f"{votes['max_batch']}, запись ср. {votes['avg_flush_ms']} мс / макс. "
+            f"{votes['max_flush_ms']} мс, ошибок {votes['failed']}, в очереди {votes['pending']}\n"
+        )
+
+    speculation = poll_speculator.get_stats()
+    if speculation["enabled"]:
+        hit_rate = (
+            f"{speculation['hit_rate'] * 100:.0f}%" if speculation["hit_rate"] is not None else "—"
+        )
+        response += (
+            f"🔮 <b>Спекулятивная генерация:</b> попаданий {speculation['hits']}, "
+            f"промахов {speculation['misses']} ({hit_rate}), "
+            f"вызовов LLM {speculation['calls']}, "
+            f"сэкономлено {speculation['saved_latency']} сек\n"
+        )
+
     await message.answer(response, parse_mode="HTML")
 
 
 @router.message(Command("logs"), AdminOrPrivateFilter())
-async def cmd_logs(message: Message, logger: FromDishka[Logger]):
+async def cmd_logs(message: Message, command: CommandObject, logger: FromDishka[Logger]):
+    args = (command.args or "").split()
+    if args and args[0] == "grep":
+        await grep_logs(message, args[1:], logger)
+        return
+
     logger.info(f"Админ {message.from_user.id} запросил последние логи")
     log_path = get_log_file_path()
     loop = asyncio.get_running_loop()
-    raw_lines = await loop.run_in_executor(None, read_last_n_lines, log_path, 100)
+    raw_lines = await loop.run_in_executor(None, read_last_n_lines, log_path, LOG_LINES_LIMIT)
+    await send_log_lines(
+        message, f"📜 <b>Последние {LOG_LINES_LIMIT} строк лога:</b>", raw_lines, logger
+    )
+
+
+async def grep_logs(message: Message, args: List[str], logger: Logger):
+    if not args:
+        await message.answer(
+            "ℹ️ Использование: /logs grep &lt;шаблон&gt; [since], "
+            "где since — 30m, 2h, 1d или дата в ISO формате",
+            parse_mode="HTML",
+        )
+        return
+
+    since = parse_since(args[-1]) if len(args) > 1 else None
+    if since is not None:
+        args = args[:-1]
+    try:
+        pattern = re.compile(" ".join(args), re.IGNORECASE)
+    except re.error as e:
+        await message.answer(f"❌ Некорректный шаблон: {e}")
+        return
+
+    loop = asyncio.get_running_loop()
+    matches, total = await loop.run_in_executor(
+        None, search_logs, get_log_file_path(), pattern, since, LOG_LINES_LIMIT
+    )
+    logger.info(f"Админ {message.from_user.id} искал в логах {pattern.pattern!r}: {total} строк")
+    if not total:
+        await message.answer("🔍 Совпадений в логах не найдено")
+        return
 
+    title = f"🔍 <b>Найдено строк: {total}</b>"
+    if total > len(matches):
+        title += f", показаны последние {len(matches)}"
+    await send_log_lines(message, title, matches, logger)
+
+
+async def send_log_lines(message: Message, title: str, raw_lines: List[str], logger: Logger):
     escaped_lines = [html.escape(line) for line in raw_lines]
     log_content = "\n".join(escaped_lines)
-    full_text = "📜 <b>Последние 100 строк лога:</b>\n\n" "<code>" + log_content + "</code>"
+    full_text = f"{title}\n\n<code>{log_content}</code>"
 
     if len(full_text) <= 4096:
         await message.answer(full_text, parse_mode="HTML")
@@ -83,41 +225,94 @@ async def cmd_logs(message: Message, logger: FromDishka[Logger]):
                 break
 
 
+@router.message(Command("slow"), AdminOrPrivateFilter())
+async def cmd_slow(message: Message, command: CommandObject, logger: FromDishka[Logger]):
+    logger.info(f"Админ {message.from_user.id} запросил медленные циклы")
+    if (command.args or "").strip() == "clear":
+        slow_traces.clear()
+        await message.answer("🧹 Буфер медленных циклов очищен")
+        return
+
+    traces = slow_traces.get_traces()
+    if not traces:
+        await message.answer(
+            f"✅ Циклов дольше {slow_traces.threshold} сек не было" f" (или буфер недавно очищали)"
+        )
+        return
+
+    await message.answer(
+        f"🐢 <b>Медленные циклы:</b> {len(traces)}, порог {slow_traces.threshold} сек, "
+        "сначала свежие",
+        parse_mode="HTML",
+    )
+    for slow_trace in traces:
+        header, waterfall = format_trace(slow_trace)
+        for i, part in enumerate(split_text_for_html(waterfall, max_length=3500)):
+            title = header if i == 0 else f"<b>{html.escape(slow_trace.name)}</b> (продолжение)"
+            await message.answer(f"{title}\n<code>{part}</code>", parse_mode="HTML")
+
+
+def format_trace(slow_trace: Trace) -> Tuple[str, str]:
+    started_at = datetime.fromtimestamp(slow_trace.started_at).strftime("%Y-%m-%d %H:%M:%S")
+    attributes = " ".join(f"{key}={value}" for key, value in slow_trace.attributes.items())
+    header = (
+        f"<b>{html.escape(slow_trace.name)}</b> {html.escape(attributes)}\n"
+        f"⏱ {slow_trace.duration:.2f} сек, начало {started_at}"
+    )
+    if slow_trace.error:
+        header += f", ❌ {html.escape(slow_trace.error)}"
+
+    lines = [f"{'старт мс':>9} {'длит. мс':>9}  этап"]
+    for span in slow_trace.spans:
+        duration = f"{span.duration * 1000:9.1f}" if span.duration is not None else f"{'…':>9}"
+        line = f"{span.start * 1000:9.1f} {duration}  {'  ' * span.depth}{span.name}"
+        if span.error:
+            line += f" ❌ {span.error}"
+        lines.append(html.escape(line))
+    if slow_trace.dropped_spans:
+        lines.append(f"… ещё {slow_trace.dropped_spans} этапов не записано")
+    return header, "\n".join(lines)
+
+
 @router.message(Command("alllogs"), AdminOrPrivateFilter())
 async def cmd_alllogs(message: Message, logger: FromDishka[Logger]):
     logger.info(f"Админ {message.from_user.id} запросил полный лог")
 
-    log_path = get_log_file_path()
+    log_files = get_log_files(get_log_file_path())
 
-    if not log_path.exists():
+    if not log_files:
         await message.answer("❌ Лог-файл не найден.")
         return
 
-    file_size = log_path.stat().st_size
     MAX_TELEGRAM_FILE_SIZE = 50 * 1024 * 1024
 
-    if file_size > MAX_TELEGRAM_FILE_SIZE:
-        loop = asyncio.get_running_loop()
-        content = await loop.run_in_executor(None, read_full_log, log_path)
-        text = (
-            "📎 <b>Полный лог (слишком большой для файла, отправляю текстом):</b>\n\n<code>"
-            + content[:9000].replace("<", "<").replace(">", ">")
-            + ("..." if len(content) > 9000 else "")
-            + "</code>"
-        )
-        parts = split_text(text, max_length=4000)
-        for part in parts[:5]:
-            await message.answer(part, parse_mode="HTML")
-        if len(parts) > 5:
-            await message.answer("⚠️ Лог слишком длинный — показаны только первые ~45k символов.")
-    else:
-        try:
-            await message.answer_document(
-                FSInputFile(log_path, filename="bot.log"),
-                caption=f"📁 Полный лог-файл ({file_size / 1024:.1f} КБ)",
+    for log_path in log_files:
+        file_size = log_path.stat().st_size
+        if file_size > MAX_TELEGRAM_FILE_SIZE:
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, read_log_head, log_path, 9001)
+            text = (
+                f"📎 <b>{log_path.name} (слишком большой для файла, отправляю текстом):</b>"
+                "\n\n<code>"
+                + html.escape(content[:9000])
+                + ("..." if len(content) > 9000 else "")
+                + "</code>"
             )
-        except Exception as e:
-            await message.answer(f"❌ Не удалось отправить файл: {e}")
+            parts = split_text(text, max_length=4000)
+            for part in parts[:5]:
+                await message.answer(part, parse_mode="HTML")
+            if len(parts) > 5:
+                await message.answer(
+                    "⚠️ Лог слишком длинный — показаны только первые ~45k символов."
+                )
+        else:
+            try:
+                await message.answer_document(
+                    FSInputFile(log_path, filename=log_path.name),
+                    caption=f"📁 Лог-файл {log_path.name} ({file_size / 1024:.1f} КБ)",
+                )
+            except Exception as e:
+                await message.answer(f"❌ Не удалось отправить файл {log_path.name}: {e}")
 
 
 def split_text(text: str, max_length: int = 4000) -> List[str]:
@@ -2,15 +2,26 @@ import json
 from logging import Logger
 
 from aiogram import Router
+from aiogram.dispatcher.event.bases import SkipHandler
 from aiogram.filters import ADMINISTRATOR, IS_MEMBER, IS_NOT_MEMBER, KICKED, ChatMemberUpdatedFilter
 from aiogram.types import Chat, ChatMemberUpdated
 from dishka import FromDishka
+from src.services.admin import AdminService
 from src.services.chat import ChatService
 
 
 router = Router()
 
 
+@router.chat_member()
+@router.my_chat_member()
+async def on_chat_member_changed(
+    update: ChatMemberUpdated, admin_service: FromDishka[AdminService]
+):
+    await admin_service.invalidate(update.chat.id)
+    raise SkipHandler()
+
+
 @router.my_chat_member(
     ChatMemberUpdatedFilter(
         member_status_changed=(IS_NOT_MEMBER | ADMINISTRATOR) >> (IS_MEMBER | ADMINISTRATOR)
@@ -4,9 +4,11 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, PollAnswer
 from dishka import FromDishka
+from src.core.config import Settings
 from src.filters.admin_or_private import AdminOrPrivateFilter
 from src.infrastructure.redis.storages.poll import PollStorage
 from src.services.poll import PollService
+from src.services.vote_buffer import VoteBuffer
 
 
 router = Router()
@@ -14,10 +16,17 @@ router = Router()
 
 @router.poll_answer()
 async def handle_poll_answer(
-    poll_answer: PollAnswer, logger: FromDishka[Logger], poll_storage: FromDishka[PollStorage]
+    poll_answer: PollAnswer, logger: FromDishka[Logger], vote_buffer: FromDishka[VoteBuffer]
 ):
-    await poll_storage.add_vote(poll_answer.poll_id, poll_answer.user.id, poll_answer.option_ids[0])
-    logger.info(
+    if not poll_answer.option_ids:
+        vote_buffer.submit(poll_answer.poll_id, poll_answer.user.id, None)
+        logger.debug(
+            f"Пользователь {poll_answer.user.id} отозвал голос в опросе {poll_answer.poll_id}"
+        )
+        return
+
+    vote_buffer.submit(poll_answer.poll_id, poll_answer.user.id, poll_answer.option_ids[0])
+    logger.debug(
         f"Пользователь {poll_answer.user.id} проголосовал за вариант {poll_answer.option_ids} в опросе {poll_answer.poll_id}"
     )
 
@@ -27,8 +36,20 @@ async def cmd_start(
     message: Message,
     logger: FromDishka[Logger],
     poll_service: FromDishka[PollService],
+    poll_storage: FromDishka[PollStorage],
+    config: FromDishka[Settings],
 ):
     logger.info(
         f"Пользователь {message.from_user.id} запросил отправку отпроса в чате {message.chat.id}"
     )
-    await poll_service.process_chat_poll(message.chat.id, message.bot)
+    lease_owner = f"sendnow:{message.chat.id}:{message.message_id}"
+    if not await poll_storage.acquire_chat_lease(
+        message.chat.id, lease_owner, config.WORKER_CHAT_TIMEOUT
+    ):
+        await message.answer("⏳ Опрос в этом чате уже обрабатывается, попробуйте чуть позже")
+        return
+
+    try:
+        await poll_service.process_chat_poll(message.chat.id, message.bot)
+    finally:
+        await poll_storage.release_chat_lease(message.chat.id, lease_owner)
@@ -4,9 +4,11 @@ from src.handlers.code import router as code_router
 from src.handlers.group import router as group_router
 from src.handlers.poll import router as polls_router
 from src.handlers.start import router as start_router
+from src.middlewares.tracing import TracingMiddleware
 
 
 def setup_dp(dp: Dispatcher):
+    dp.update.outer_middleware(TracingMiddleware())
     dp.include_router(start_router)
     dp.include_router(code_router)
     dp.include_router(admin_router)
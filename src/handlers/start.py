@@ -4,6 +4,7 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 from dishka import FromDishka
+from src.application.errors.poll import PollOptionsUnavailableException
 from src.filters.admin import AdminFilter
 from src.filters.private_chat import PrivateChatFilter
 from src.services.chat import ChatService
@@ -25,7 +26,12 @@ async def cmd_start(
     await code_line_service.clear_chat_code(message.chat.id)
     await poll_service.clear_chat(message)
     await message.answer("Привет! Давайте напишем новую программу")
-    await poll_service.create_poll_for_chat(message.chat.id, message.bot)
+    try:
+        await poll_service.create_poll_for_chat(message.chat.id, message.bot)
+    except PollOptionsUnavailableException:
+        await message.answer(
+            "⚠️ Сервис генерации вариантов временно недоступен, попробуйте /start позже"
+        )
 
 
 @router.message(Command("start"), PrivateChatFilter())
@@ -41,4 +47,9 @@ async def cmd_start_private(
     await code_line_service.clear_chat_code(message.chat.id)
     await poll_service.clear_chat(message)
     await message.answer("Привет! Давайте напишем новую программу")
-    await poll_service.create_poll_for_chat(message.chat.id, message.bot)
+    try:
+        await poll_service.create_poll_for_chat(message.chat.id, message.bot)
+    except PollOptionsUnavailableException:
+        await message.answer(
+            "⚠️ Сервис генерации вариантов временно недоступен, попробуйте /start позже"
+        )
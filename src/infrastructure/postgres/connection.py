@@ -3,6 +3,7 @@ from sqlalchemy.engine.url import URL
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from src.core.config import config
+from src.infrastructure.postgres.pool import TimedAsyncAdaptedQueuePool
 
 
 class BaseWithAsDict:
@@ -31,9 +32,10 @@ DATABASE_URL = URL.create(
 engine = create_async_engine(
     DATABASE_URL,
     connect_args=SQLALCHEMY_CONNECT_ARGS,
-    pool_size=30,
-    max_overflow=50,
-    pool_timeout=10,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    pool_size=config.PG_POOL_SIZE,
+    max_overflow=config.PG_MAX_OVERFLOW,
+    pool_timeout=config.PG_POOL_TIMEOUT,
     pool_recycle=1800,
     pool_pre_ping=True,
 )
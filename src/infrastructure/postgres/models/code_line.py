@@ -7,6 +7,7 @@ from sqlalchemy import (
     ForeignKey,
     Integer,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 from src.infrastructure.postgres.connection import Base
@@ -14,10 +15,13 @@ from src.infrastructure.postgres.connection import Base
 
 class CodeLine(Base):
     __tablename__ = "code_lines"
+    __table_args__ = (
+        UniqueConstraint("chat_id", "line_number", name="uq_code_lines_chat_id_line_number"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     chat_id = Column(BigInteger, ForeignKey("chats.telegram_chat_id"))
-    poll_id = Column(Text, ForeignKey("polls.telegram_poll_id"))
+    poll_id = Column(Text, ForeignKey("polls.telegram_poll_id"), index=True)
     line_number = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.now, nullable=False)
@@ -18,7 +18,7 @@ class Poll(Base):
     __tablename__ = "polls"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    chat_id = Column(BigInteger, ForeignKey("chats.telegram_chat_id"))
+    chat_id = Column(BigInteger, ForeignKey("chats.telegram_chat_id"), index=True)
     telegram_poll_id = Column(Text, unique=True, nullable=False)
     question = Column(Text)
     status = Column(ENUM(PollStatus, name="poll_status_type"), default="active")
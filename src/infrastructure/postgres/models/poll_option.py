@@ -3,6 +3,7 @@ from sqlalchemy import (
     ForeignKey,
     Integer,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 from src.infrastructure.postgres.connection import Base
@@ -10,6 +11,9 @@ from src.infrastructure.postgres.connection import Base
 
 class PollOption(Base):
     __tablename__ = "poll_options"
+    __table_args__ = (
+        UniqueConstraint("poll_id", "option_index", name="uq_poll_options_poll_id_option_index"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     poll_id = Column(Text, ForeignKey("polls.telegram_poll_id"))
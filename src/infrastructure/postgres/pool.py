@@ -0,0 +1,41 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self._timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started
+            self._checkouts += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+
+    def get_stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": self._checkouts,
+            "timeouts": self._timeouts,
+            "avg_wait_ms": (
+                round(self._total_wait / self._checkouts * 1000, 2) if self._checkouts else 0.0
+            ),
+            "max_wait_ms": round(self._max_wait * 1000, 2),
+        }
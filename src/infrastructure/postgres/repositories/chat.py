@@ -2,9 +2,11 @@ from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.application.errors.chat import ChatNotFoundException
 from src.application.schemas.chat import ChatCreateDTO, ChatResponseDTO
+from src.core.metrics import db_query_duration, db_query_errors, instrument_methods
 from src.infrastructure.postgres.models.chat import Chat
 
 
+@instrument_methods(db_query_duration, db_query_errors)
 class ChatDBGateWay:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -3,15 +3,19 @@ from typing import List
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.application.schemas.code_line import CodeLineCreateDTO, CodeLineResponseDTO
+from src.core.metrics import db_query_duration, db_query_errors, instrument_methods
 from src.infrastructure.postgres.models.code_line import CodeLine
 
 
+@instrument_methods(db_query_duration, db_query_errors)
 class CodeLineDBGateWay:
     def __init__(self, session: AsyncSession):
         self.session = session
 
     async def get_chat_code(self, chat_id: int) -> List[CodeLineResponseDTO]:
-        result = await self.session.execute(select(CodeLine).where(CodeLine.chat_id == chat_id))
+        result = await self.session.execute(
+            select(CodeLine).where(CodeLine.chat_id == chat_id).order_by(CodeLine.line_number)
+        )
         code_lines: List[CodeLine] = list(result.scalars().all())
         return [CodeLineResponseDTO.model_validate(code_line.as_dict()) for code_line in code_lines]
 
@@ -1,10 +1,20 @@
-from sqlalchemy import delete, select
+from typing import List
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.application.errors.poll import PollAlreadyExistException, PollNotFoundException
 from src.application.schemas.poll import PollCreateDTO, PollResponseDTO
+from src.application.schemas.poll_option import PollOptionCreateDTO
+from src.core.metrics import db_query_duration, db_query_errors, instrument_methods
 from src.infrastructure.postgres.models.poll import Poll
+from src.infrastructure.postgres.models.poll_option import PollOption
+
+
+UNIQUE_VIOLATION_SQLSTATE = "23505"
 
 
+@instrument_methods(db_query_duration, db_query_errors)
 class PollDBGateWay:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -28,6 +38,27 @@ class PollDBGateWay:
 
         return PollResponseDTO.model_validate(new_poll.as_dict())
 
+    async def create_poll_with_options(
+        self, poll_data: PollCreateDTO, options_data: List[PollOptionCreateDTO]
+    ) -> PollResponseDTO:
+        try:
+            result = await self.session.execute(
+                insert(Poll).values(**poll_data.model_dump()).returning(Poll)
+            )
+            poll = PollResponseDTO.model_validate(result.scalars().one().as_dict())
+            if options_data:
+                await self.session.execute(
+                    insert(PollOption).values([option.model_dump() for option in options_data])
+                )
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            if getattr(e.orig, "sqlstate", None) == UNIQUE_VIOLATION_SQLSTATE:
+                raise PollAlreadyExistException()
+            raise
+
+        return poll
+
     async def is_exist(self, telegram_poll_id: str) -> bool:
         result = await self.session.execute(
             select(Poll).where(Poll.telegram_poll_id == telegram_poll_id)
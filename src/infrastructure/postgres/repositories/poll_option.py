@@ -5,10 +5,12 @@ from src.application.errors.poll_option import (
     PollOptionNotFoundException,
 )
 from src.application.schemas.poll_option import PollOptionCreateDTO, PollOptionResponseDTO
+from src.core.metrics import db_query_duration, db_query_errors, instrument_methods
 from src.infrastructure.postgres.models.poll import Poll
 from src.infrastructure.postgres.models.poll_option import PollOption
 
 
+@instrument_methods(db_query_duration, db_query_errors)
 class PollOptionDBGateWay:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -0,0 +1,53 @@
+import json
+import time
+from logging import Logger
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from redis.asyncio import Redis
+from src.core.config import Settings
+from src.core.metrics import instrument_methods, redis_operation_duration, redis_operation_errors
+
+
+CHAT_ADMINS_PREFIX = "chat_admins:"
+LOCAL_CACHE_MAX_CHATS = 1000
+
+
+@instrument_methods(redis_operation_duration, redis_operation_errors)
+class AdminCacheStorage:
+    def __init__(self, redis_client: Redis, logger: Logger, config: Settings):
+        self.redis_client = redis_client
+        self.logger = logger
+        self.ttl = config.ADMIN_CACHE_TTL
+        self.local_ttl = config.ADMIN_CACHE_LOCAL_TTL
+        self._local: Dict[int, Tuple[float, FrozenSet[int]]] = {}
+
+    async def get_admins(self, chat_id: int) -> Optional[FrozenSet[int]]:
+        local = self._local.get(chat_id)
+        if local is not None and local[0] > time.monotonic():
+            return local[1]
+
+        cached = await self.redis_client.get(f"{CHAT_ADMINS_PREFIX}{chat_id}")
+        if cached is None:
+            self._local.pop(chat_id, None)
+            return None
+
+        admin_ids = frozenset(json.loads(cached))
+        self._remember(chat_id, admin_ids)
+        return admin_ids
+
+    async def set_admins(self, chat_id: int, admin_ids: Iterable[int]):
+        admin_ids = frozenset(admin_ids)
+        await self.redis_client.set(
+            f"{CHAT_ADMINS_PREFIX}{chat_id}", json.dumps(sorted(admin_ids)), ex=self.ttl
+        )
+        self._remember(chat_id, admin_ids)
+
+    async def invalidate(self, chat_id: int):
+        self._local.pop(chat_id, None)
+        await self.redis_client.delete(f"{CHAT_ADMINS_PREFIX}{chat_id}")
+
+    def _remember(self, chat_id: int, admin_ids: FrozenSet[int]):
+        now = time.monotonic()
+        if len(self._local) >= LOCAL_CACHE_MAX_CHATS:
+            self._local = {key: value for key, value in self._local.items() if value[0] > now}
+        self._local[chat_id] = (now + self.local_ttl, admin_ids)
@@ -0,0 +1,89 @@
+from logging import Logger
+from typing import List, Optional
+
+from redis.asyncio import Redis
+from src.application.schemas.code_line import CodeLineResponseDTO
+from src.core.config import Settings
+from src.core.metrics import instrument_methods, redis_operation_duration, redis_operation_errors
+
+
+CHAT_CODE_PREFIX = "chat_code:"
+
+FILL_CHAT_CODE_SCRIPT = """
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[2])
+return 1
+"""
+
+APPEND_CHAT_CODE_SCRIPT = """
+local version = redis.call('INCR', KEYS[3])
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    if redis.call('LLEN', KEYS[1]) == tonumber(ARGV[1]) - 1 then
+        redis.call('RPUSH', KEYS[1], ARGV[3])
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+        redis.call('EXPIRE', KEYS[2], ARGV[2])
+    else
+        redis.call('DEL', KEYS[1], KEYS[2])
+    end
+end
+return version
+"""
+
+
+@instrument_methods(redis_operation_duration, redis_operation_errors)
+class CodeCacheStorage:
+    def __init__(self, redis_client: Redis, logger: Logger, config: Settings):
+        self.redis_client = redis_client
+        self.logger = logger
+        self.ttl = config.CODE_CACHE_TTL
+        self._fill_chat_code = redis_client.register_script(FILL_CHAT_CODE_SCRIPT)
+        self._append_chat_code = redis_client.register_script(APPEND_CHAT_CODE_SCRIPT)
+
+    @staticmethod
+    def _keys(chat_id: int) -> List[str]:
+        prefix = f"{CHAT_CODE_PREFIX}{chat_id}"
+        return [f"{prefix}:lines", f"{prefix}:cached", f"{prefix}:version"]
+
+    async def get_version(self, chat_id: int) -> int:
+        _, _, version_key = self._keys(chat_id)
+        return int(await self.redis_client.get(version_key) or 0)
+
+    async def get_lines(self, chat_id: int) -> Optional[List[CodeLineResponseDTO]]:
+        lines_key, cached_key, _ = self._keys(chat_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.exists(cached_key)
+            pipe.lrange(lines_key, 0, -1)
+            cached, lines = await pipe.execute()
+
+        if not cached:
+            return None
+        return [CodeLineResponseDTO.model_validate_json(line) for line in lines]
+
+    async def fill(self, chat_id: int, version: int, code_lines: List[CodeLineResponseDTO]) -> bool:
+        return bool(
+            await self._fill_chat_code(
+                keys=self._keys(chat_id),
+                args=[version, self.ttl, *(line.model_dump_json() for line in code_lines)],
+            )
+        )
+
+    async def append(self, chat_id: int, code_line: CodeLineResponseDTO) -> int:
+        return await self._append_chat_code(
+            keys=self._keys(chat_id),
+            args=[code_line.line_number, self.ttl, code_line.model_dump_json()],
+        )
+
+    async def invalidate(self, chat_id: int) -> int:
+        lines_key, cached_key, version_key = self._keys(chat_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(lines_key, cached_key)
+            pipe.incr(version_key)
+            _, version = await pipe.execute()
+        return version
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import time
+from logging import Logger
+from typing import List, Optional
+
+from redis.asyncio import Redis
+from src.core.config import Settings
+from src.core.metrics import instrument_methods, redis_operation_duration, redis_operation_errors
+
+
+LLM_CACHE_PREFIX = "llm_cache:"
+LLM_CACHE_LRU_KEY = "llm_cache_lru"
+LLM_CACHE_STATS_KEY = "llm_cache_stats"
+
+PUT_CACHE_ENTRY_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[3], KEYS[1])
+local excess = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[4])
+if excess > 0 then
+    local evicted = redis.call('ZRANGE', KEYS[2], 0, excess - 1)
+    for _, key in ipairs(evicted) do
+        redis.call('DEL', key)
+    end
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, excess - 1)
+    redis.call('HINCRBY', KEYS[3], 'evictions', excess)
+    return excess
+end
+return 0
+"""
+
+
+def normalize_context(code_lines: List[str]) -> str:
+    normalized = [line.expandtabs(4).rstrip() for line in code_lines]
+    return "\n".join(line for line in normalized if line.strip())
+
+
+@instrument_methods(redis_operation_duration, redis_operation_errors)
+class LLMCacheStorage:
+    def __init__(self, redis_client: Redis, logger: Logger, config: Settings):
+        self.redis_client = redis_client
+        self.logger = logger
+        self.config = config
+        self.ttl = config.LLM_CACHE_TTL
+        self.max_entries = config.LLM_CACHE_MAX_ENTRIES
+        self._put_cache_entry = redis_client.register_script(PUT_CACHE_ENTRY_SCRIPT)
+
+    def build_key(self, model: str, namespace: str, code_lines: List[str]) -> str:
+        digest = hashlib.sha256(
+            f"{namespace}\n{normalize_context(code_lines)}".encode("utf-8")
+        ).hexdigest()
+        return f"{LLM_CACHE_PREFIX}{model}:{digest}"
+
+    async def get(self, key: str) -> Optional[List[str]]:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.zadd(LLM_CACHE_LRU_KEY, {key: time.time()}, xx=True)
+            cached, _ = await pipe.execute()
+
+        await self.redis_client.hincrby(LLM_CACHE_STATS_KEY, "hits" if cached else "misses", 1)
+        if not cached:
+            return None
+        return json.loads(cached)
+
+    async def set(self, key: str, options: List[str]):
+        await self._put_cache_entry(
+            keys=[key, LLM_CACHE_LRU_KEY, LLM_CACHE_STATS_KEY],
+            args=[json.dumps(options, ensure_ascii=False), self.ttl, time.time(), self.max_entries],
+        )
+
+    async def get_stats(self) -> dict:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(LLM_CACHE_STATS_KEY)
+            pipe.zcard(LLM_CACHE_LRU_KEY)
+            stats, entries = await pipe.execute()
+
+        hits = int(stats.get("hits", 0))
+        misses = int(stats.get("misses", 0))
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": int(stats.get("evictions", 0)),
+            "entries": entries,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
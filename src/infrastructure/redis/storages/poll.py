@@ -1,16 +1,108 @@
+import json
 from datetime import datetime, timedelta, timezone
 from logging import Logger
-from typing import Dict, List, Optional, Set
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 
 from redis.asyncio import Redis
 from src.core.config import Settings
+from src.core.metrics import instrument_methods, redis_operation_duration, redis_operation_errors
 
 
+NEXT_POLL_INDEX_KEY = "next_poll_deadlines"
+NEXT_POLL_MIGRATION_KEY = "next_poll_deadlines:migrated"
+LEGACY_NEXT_POLL_PREFIX = "next_poll_at:"
+NEXT_POLL_WAKEUP_CHANNEL = "next_poll_deadlines:wakeup"
+PUBSUB_READ_TIMEOUT = 1.0
+CHAT_LEASE_PREFIX = "poll_lease:"
+POLL_WORKERS_KEY = "poll_workers"
+
+CLAIM_EXPIRED_CHATS_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[4])
+local lease_ms = math.floor(tonumber(ARGV[3]) * 1000)
+local lease_until = tonumber(ARGV[1]) + tonumber(ARGV[3])
+local claimed = {}
+for i = 1, #expired, 2 do
+    local chat_id = expired[i]
+    if redis.call('SET', ARGV[5] .. chat_id, ARGV[2], 'NX', 'PX', lease_ms) then
+        table.insert(claimed, chat_id)
+        table.insert(claimed, expired[i + 1])
+    end
+    redis.call('ZADD', KEYS[1], 'XX', lease_until, chat_id)
+end
+return claimed
+"""
+
+RENEW_CHAT_LEASES_SCRIPT = """
+local renewed = 0
+for i = 1, #KEYS do
+    if redis.call('GET', KEYS[i]) == ARGV[1] then
+        redis.call('PEXPIRE', KEYS[i], ARGV[2])
+        renewed = renewed + 1
+    end
+end
+return renewed
+"""
+
+REBUILD_VOTE_COUNTS_LUA = """
+if redis.call('EXISTS', KEYS[2]) == 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+    local voters = redis.call('HGETALL', KEYS[1])
+    for i = 2, #voters, 2 do
+        redis.call('HINCRBY', KEYS[2], voters[i], 1)
+    end
+    redis.call('EXPIRE', KEYS[2], ARGV[1])
+end
+"""
+
+CAST_VOTE_SCRIPT = (
+    REBUILD_VOTE_COUNTS_LUA
+    + """
+local previous = redis.call('HGET', KEYS[1], ARGV[2])
+if (previous or '') == ARGV[3] then
+    return 0
+end
+if previous then
+    if redis.call('HINCRBY', KEYS[2], previous, -1) <= 0 then
+        redis.call('HDEL', KEYS[2], previous)
+    end
+end
+if ARGV[3] == '' then
+    redis.call('HDEL', KEYS[1], ARGV[2])
+else
+    redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+    redis.call('HINCRBY', KEYS[2], ARGV[3], 1)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+)
+
+GET_VOTE_COUNTS_SCRIPT = (
+    REBUILD_VOTE_COUNTS_LUA
+    + """
+return redis.call('HGETALL', KEYS[2])
+"""
+)
+
+RELEASE_CHAT_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@instrument_methods(redis_operation_duration, redis_operation_errors)
 class PollStorage:
     def __init__(self, redis_client: Redis, logger: Logger, config: Settings):
         self.redis_client = redis_client
         self.logger = logger
         self.config = config
+        self._claim_expired_chats = redis_client.register_script(CLAIM_EXPIRED_CHATS_SCRIPT)
+        self._renew_chat_leases = redis_client.register_script(RENEW_CHAT_LEASES_SCRIPT)
+        self._release_chat_lease = redis_client.register_script(RELEASE_CHAT_LEASE_SCRIPT)
+        self._cast_vote = redis_client.register_script(CAST_VOTE_SCRIPT)
+        self._get_vote_counts = redis_client.register_script(GET_VOTE_COUNTS_SCRIPT)
 
     async def set_active_poll(self, chat_id: int, poll_id: str) -> bool:
         key = f"active_poll:{chat_id}"
@@ -29,73 +121,209 @@ class PollStorage:
         key = f"active_poll:{chat_id}"
         return bool(await self.redis_client.delete(key))
 
-    async def add_vote(self, poll_id: str, user_id: int, option_index: int):
-        key = f"poll_user_votes:{poll_id}"
-        await self.redis_client.hset(key, str(user_id), str(option_index))
+    @staticmethod
+    def _vote_keys(poll_id: str) -> List[str]:
+        return [f"poll_user_votes:{poll_id}", f"poll_vote_counts:{poll_id}"]
 
-    async def get_poll_votes(self, poll_id: str) -> Dict[int, int]:
-        key = f"poll_user_votes:{poll_id}"
-        votes_data = await self.redis_client.hgetall(key)
+    async def add_vote(self, poll_id: str, user_id: int, option_index: int) -> bool:
+        return bool(
+            await self._cast_vote(
+                keys=self._vote_keys(poll_id),
+                args=[self.config.POLL_VOTES_TTL, str(user_id), str(option_index)],
+            )
+        )
 
-        vote_counts = {}
-        for user_id_str, option_str in votes_data.items():
-            option = int(option_str)
-            vote_counts[option] = vote_counts.get(option, 0) + 1
+    async def retract_vote(self, poll_id: str, user_id: int) -> bool:
+        return bool(
+            await self._cast_vote(
+                keys=self._vote_keys(poll_id),
+                args=[self.config.POLL_VOTES_TTL, str(user_id), ""],
+            )
+        )
+
+    async def apply_votes(self, votes: List[Tuple[str, int, Optional[int]]]) -> int:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for poll_id, user_id, option_index in votes:
+                await self._cast_vote(
+                    keys=self._vote_keys(poll_id),
+                    args=[
+                        self.config.POLL_VOTES_TTL,
+                        str(user_id),
+                        "" if option_index is None else str(option_index),
+                    ],
+                    client=pipe,
+                )
+            results = await pipe.execute()
+        return sum(1 for changed in results if changed)
 
-        return vote_counts
+    async def get_poll_votes(self, poll_id: str) -> Dict[int, int]:
+        counts = await self._get_vote_counts(
+            keys=self._vote_keys(poll_id), args=[self.config.POLL_VOTES_TTL]
+        )
+        return {
+            int(option): int(count)
+            for option, count in zip(counts[::2], counts[1::2])
+            if int(count) > 0
+        }
 
     async def get_total_votes(self, poll_id: str) -> int:
         key = f"poll_user_votes:{poll_id}"
-        votes_data = await self.redis_client.hgetall(key)
-        return len(votes_data)
+        return await self.redis_client.hlen(key)
 
     async def clear_poll_votes(self, poll_id: str) -> bool:
-        key = f"poll_user_votes:{poll_id}"
-        return bool(await self.redis_client.delete(key))
+        return bool(await self.redis_client.delete(*self._vote_keys(poll_id)))
 
-    async def set_next_poll_time(self, chat_id: int) -> datetime:
+    async def set_next_poll_time(self, chat_id: int, delay: Optional[float] = None) -> datetime:
         current_time = datetime.now(timezone.utc)
-        next_time = current_time + timedelta(seconds=self.config.POLL_TTL)
+        next_time = current_time + timedelta(
+            seconds=self.config.POLL_TTL if delay is None else delay
+        )
         timestamp = next_time.timestamp()
 
-        key = f"next_poll_at:{chat_id}"
-        await self.redis_client.set(key, str(timestamp))
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(NEXT_POLL_INDEX_KEY, {str(chat_id): timestamp})
+            pipe.zrange(NEXT_POLL_INDEX_KEY, 0, 0)
+            _, earliest = await pipe.execute()
+
+        if earliest and earliest[0] == str(chat_id):
+            await self.redis_client.publish(NEXT_POLL_WAKEUP_CHANNEL, str(timestamp))
         return next_time
 
     async def get_next_poll_time(self, chat_id: int) -> Optional[datetime]:
-        key = f"next_poll_at:{chat_id}"
-        timestamp_str = await self.redis_client.get(key)
-        if not timestamp_str:
+        timestamp = await self.redis_client.zscore(NEXT_POLL_INDEX_KEY, str(chat_id))
+        if timestamp is None:
             return None
 
-        return datetime.fromtimestamp(float(timestamp_str), tz=timezone.utc)
+        return datetime.fromtimestamp(float(timestamp), tz=timezone.utc)
+
+    async def get_earliest_deadline(self) -> Optional[float]:
+        earliest = await self.redis_client.zrange(NEXT_POLL_INDEX_KEY, 0, 0, withscores=True)
+        if not earliest:
+            return None
+        return float(earliest[0][1])
+
+    async def listen_deadline_updates(self) -> AsyncIterator[float]:
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(NEXT_POLL_WAKEUP_CHANNEL)
+        try:
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=PUBSUB_READ_TIMEOUT
+                )
+                if message is None:
+                    continue
+                try:
+                    yield float(message["data"])
+                except (ValueError, TypeError, KeyError):
+                    continue
+        finally:
+            await pubsub.unsubscribe(NEXT_POLL_WAKEUP_CHANNEL)
+            await pubsub.aclose()
 
     async def clear_next_poll_time(self, chat_id: int):
-        key = f"next_poll_at:{chat_id}"
-        await self.redis_client.delete(key)
+        await self.redis_client.zrem(NEXT_POLL_INDEX_KEY, str(chat_id))
 
     async def get_expired_chats(self, current_timestamp: float) -> Set[int]:
-        expired_chats = set()
-        cursor = "0"
+        expired = await self.get_expired_chats_with_deadlines(current_timestamp)
+        return {chat_id for chat_id, _ in expired}
 
-        while cursor != 0:
+    async def get_expired_chats_with_deadlines(
+        self, current_timestamp: float
+    ) -> List[Tuple[int, float]]:
+        members = await self.redis_client.zrangebyscore(
+            NEXT_POLL_INDEX_KEY, "-inf", current_timestamp, withscores=True
+        )
+
+        expired_chats = []
+        for member, deadline in members:
+            try:
+                expired_chats.append((int(member), float(deadline)))
+            except (ValueError, TypeError):
+                continue
+
+        return expired_chats
+
+    async def claim_expired_chats(
+        self, current_timestamp: float, owner: str, lease_ttl: float, limit: int
+    ) -> List[Tuple[int, float]]:
+        claimed = await self._claim_expired_chats(
+            keys=[NEXT_POLL_INDEX_KEY],
+            args=[current_timestamp, owner, lease_ttl, limit, CHAT_LEASE_PREFIX],
+        )
+
+        claimed_chats = []
+        for chat_id, deadline in zip(claimed[::2], claimed[1::2]):
+            try:
+                claimed_chats.append((int(chat_id), float(deadline)))
+            except (ValueError, TypeError):
+                continue
+
+        return claimed_chats
+
+    async def acquire_chat_lease(self, chat_id: int, owner: str, lease_ttl: float) -> bool:
+        key = f"{CHAT_LEASE_PREFIX}{chat_id}"
+        return bool(await self.redis_client.set(key, owner, nx=True, px=int(lease_ttl * 1000)))
+
+    async def renew_chat_leases(self, chat_ids: List[int], owner: str, lease_ttl: float) -> int:
+        if not chat_ids:
+            return 0
+        keys = [f"{CHAT_LEASE_PREFIX}{chat_id}" for chat_id in chat_ids]
+        return int(await self._renew_chat_leases(keys=keys, args=[owner, int(lease_ttl * 1000)]))
+
+    async def release_chat_lease(self, chat_id: int, owner: str) -> bool:
+        key = f"{CHAT_LEASE_PREFIX}{chat_id}"
+        return bool(await self._release_chat_lease(keys=[key], args=[owner]))
+
+    async def register_worker(self, owner: str, current_timestamp: float, ttl: float):
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(POLL_WORKERS_KEY, {owner: current_timestamp})
+            pipe.zremrangebyscore(POLL_WORKERS_KEY, "-inf", current_timestamp - ttl)
+            await pipe.execute()
+
+    async def unregister_worker(self, owner: str):
+        await self.redis_client.zrem(POLL_WORKERS_KEY, owner)
+
+    async def get_active_workers(self, current_timestamp: float, ttl: float) -> List[str]:
+        return await self.redis_client.zrangebyscore(
+            POLL_WORKERS_KEY, current_timestamp - ttl, "+inf"
+        )
+
+    async def migrate_legacy_next_poll_keys(self) -> int:
+        if await self.redis_client.exists(NEXT_POLL_MIGRATION_KEY):
+            return 0
+
+        migrated = 0
+        cursor = 0
+        while True:
             cursor, keys = await self.redis_client.scan(
-                cursor=int(cursor), match="next_poll_at:*", count=100
+                cursor=cursor, match=f"{LEGACY_NEXT_POLL_PREFIX}*", count=500
             )
 
-            for key in keys:
-                try:
-                    chat_id = int(key.split(":")[1])
-                    timestamp_str = await self.redis_client.get(key)
-
-                    if timestamp_str:
-                        timestamp = float(timestamp_str)
-                        if timestamp <= current_timestamp:
-                            expired_chats.add(chat_id)
-                except (ValueError, TypeError, IndexError):
-                    continue
+            if keys:
+                timestamps = await self.redis_client.mget(keys)
+                deadlines = {}
+                for key, timestamp_str in zip(keys, timestamps):
+                    try:
+                        chat_id = int(key.split(":")[1])
+                        deadlines[str(chat_id)] = float(timestamp_str)
+                    except (ValueError, TypeError, IndexError):
+                        continue
 
-        return expired_chats
+                async with self.redis_client.pipeline(transaction=True) as pipe:
+                    if deadlines:
+                        pipe.zadd(NEXT_POLL_INDEX_KEY, deadlines, nx=True)
+                    pipe.delete(*keys)
+                    await pipe.execute()
+                migrated += len(deadlines)
+
+            if cursor == 0:
+                break
+
+        await self.redis_client.set(NEXT_POLL_MIGRATION_KEY, str(migrated))
+        self.logger.info(
+            f"🗂 Перенесено {migrated} ключей {LEGACY_NEXT_POLL_PREFIX}* в индекс дедлайнов"
+        )
+        return migrated
 
     async def get_all_active_polls(self) -> List[str]:
         keys = await self.redis_client.keys("active_poll:*")
@@ -103,3 +331,26 @@ class PollStorage:
             return []
         poll_ids = await self.redis_client.mget(keys)
         return [pid for pid in poll_ids if pid is not None and pid != ""]
+
+    async def save_speculation(
+        self, poll_id: str, option_index: int, speculation: dict, ttl: int
+    ) -> None:
+        key = f"poll_speculation:{poll_id}"
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, str(option_index), json.dumps(speculation, ensure_ascii=False))
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def pop_speculation(self, poll_id: str, option_index: int) -> Optional[dict]:
+        key = f"poll_speculation:{poll_id}"
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hget(key, str(option_index))
+            pipe.delete(key)
+            speculation, _ = await pipe.execute()
+
+        if not speculation:
+            return None
+        try:
+            return json.loads(speculation)
+        except json.JSONDecodeError:
+            return None
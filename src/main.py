@@ -6,8 +6,9 @@ from dishka.integrations.aiogram import (
     AiogramProvider,
     setup_dishka,
 )
-from src.core.config import Settings
+from src.core.config import config
 from src.core.log import logger
+from src.core.metrics import MetricsServer, metrics
 from src.core.modules.cache import CacheProvider
 from src.core.modules.chat import ChatProvider
 from src.core.modules.code import CodeProvider
@@ -16,43 +17,107 @@ from src.core.modules.db import DBProvider
 from src.core.modules.llm import LLMProvider
 from src.core.modules.logger import LoggerProvider
 from src.core.modules.poll import PollProvider
+from src.core.modules.telegram import TelegramProvider
+from src.external.llm.proxy_api import ProxyAPI
+from src.external.telegram.metrics import RequestMetricsMiddleware
+from src.external.telegram.rate_limiter import OutboundRateLimiter
 from src.handlers.setup import setup_dp
-from src.infrastructure.postgres.connection import DATABASE_URL
+from src.infrastructure.postgres.connection import AsyncSessionLocal, engine
 from src.infrastructure.redis.connection import async_redis_client
+from src.infrastructure.redis.storages.llm_cache import LLMCacheStorage
+from src.infrastructure.redis.storages.poll import PollStorage
+from src.services.option_generator import PollOptionsGenerator
+from src.services.speculation import PollSpeculator
+from src.services.vote_buffer import VoteBuffer
+from src.webhook import run_webhook
 from src.worker.poll import setup_poll_worker
 
 
-config = Settings()
 bot = Bot(config.BOT_TOKEN)
+rate_limiter = OutboundRateLimiter(config, logger)
+bot.session.middleware(rate_limiter)
+bot.session.middleware(RequestMetricsMiddleware())
 dp = Dispatcher()
-poll_worker = setup_poll_worker(config, logger, bot)
+llm = ProxyAPI(config, logger)
+poll_options_generator = PollOptionsGenerator(
+    llm, LLMCacheStorage(async_redis_client, logger, config), logger, config
+)
+poll_speculator = PollSpeculator(
+    poll_options_generator, PollStorage(async_redis_client, logger, config), logger, config
+)
+vote_buffer = VoteBuffer(PollStorage(async_redis_client, logger, config), logger, config)
+poll_worker = setup_poll_worker(
+    config, logger, bot, llm, poll_options_generator, poll_speculator, AsyncSessionLocal
+)
 container = make_async_container(
-    DBProvider(DATABASE_URL),
+    DBProvider(engine, AsyncSessionLocal),
     CacheProvider(),
     LoggerProvider(),
     ChatProvider(),
     ConfigProvider(),
-    LLMProvider(),
-    PollProvider(poll_worker),
+    LLMProvider(llm, poll_options_generator),
+    PollProvider(poll_worker, poll_speculator, vote_buffer),
     CodeProvider(),
+    TelegramProvider(rate_limiter),
     AiogramProvider(),
 )
 
 setup_dishka(container, dp, auto_inject=True)
 setup_dp(dp)
 
+metrics_server = MetricsServer(config, logger)
+metrics.gauge(
+    "db_pool_checked_out",
+    "Занятые соединения пула Postgres",
+    lambda: engine.sync_engine.pool.get_stats()["checked_out"],
+)
+metrics.gauge(
+    "telegram_send_queue_depth",
+    "Исходящие запросы, ожидающие лимита Telegram",
+    lambda: rate_limiter.get_stats()["queue_depth"],
+)
+metrics.gauge(
+    "vote_buffer_pending", "Голоса в буфере до записи", lambda: vote_buffer.get_stats()["pending"]
+)
+metrics.gauge(
+    "llm_circuit_open",
+    "Открыт ли circuit breaker LLM",
+    lambda: llm.circuit_breaker.get_status()["state"] == "open",
+)
+
 
-async def main():
+async def on_startup():
+    await metrics_server.start()
     await poll_worker.start()
     logger.info("🚀 Poll worker успешно запущен")
 
+
+async def on_shutdown():
+    await poll_worker.stop()
+    await poll_speculator.stop()
+    await vote_buffer.stop()
+    await rate_limiter.close()
+    await metrics_server.stop()
+    await llm.close()
+    logger.info("🔌 Сессия LLM клиента закрыта")
+    await engine.dispose()
+    logger.info("🔌 Пул соединений с Postgres закрыт")
+    await async_redis_client.aclose()
+    logger.info("🔌 Соединение с Redis закрыто")
+
+
+async def main():
+    await on_startup()
+
     try:
-        await dp.start_polling(bot)
+        await bot.delete_webhook()
+        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
-        await poll_worker.stop()
-        await async_redis_client.aclose()
-        logger.info("🔌 Соединение с Redis закрыто")
+        await on_shutdown()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if config.BOT_MODE == "webhook":
+        run_webhook(bot, dp, config, logger, on_startup, on_shutdown, rate_limiter)
+    else:
+        asyncio.run(main())
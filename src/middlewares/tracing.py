@@ -0,0 +1,24 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from src.core.tracing import trace
+
+
+class TracingMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        attributes = {"update_id": event.update_id}
+        name = f"update:{event.event_type}"
+        if event.message is not None:
+            attributes["chat_id"] = event.message.chat.id
+            text = event.message.text or ""
+            if text.startswith("/"):
+                name = f"command:{text.split()[0].split('@')[0]}"
+
+        with trace(name, **attributes):
+            return await handler(event, data)
@@ -0,0 +1,34 @@
+from logging import Logger
+
+from aiogram import Bot
+from src.infrastructure.redis.storages.admin import AdminCacheStorage
+
+
+class AdminService:
+    def __init__(self, admin_cache: AdminCacheStorage, logger: Logger):
+        self.admin_cache = admin_cache
+        self.logger = logger
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        try:
+            admin_ids = await self.admin_cache.get_admins(chat_id)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка чтения кэша администраторов чата {chat_id}: {str(e)}")
+            admin_ids = None
+
+        if admin_ids is None:
+            administrators = await bot.get_chat_administrators(chat_id)
+            admin_ids = frozenset(admin.user.id for admin in administrators)
+            try:
+                await self.admin_cache.set_admins(chat_id, admin_ids)
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка записи кэша администраторов чата {chat_id}: {str(e)}")
+
+        return user_id in admin_ids
+
+    async def invalidate(self, chat_id: int):
+        try:
+            await self.admin_cache.invalidate(chat_id)
+            self.logger.debug(f"🧹 Кэш администраторов чата {chat_id} сброшен")
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка сброса кэша администраторов чата {chat_id}: {str(e)}")
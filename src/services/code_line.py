@@ -5,29 +5,52 @@ from src.application.schemas.code_line import CodeLineCreateDTO, CodeLineRespons
 from src.external.llm import prompt
 from src.external.llm.proxy_api import ProxyAPI
 from src.infrastructure.postgres.repositories.code_line import CodeLineDBGateWay
+from src.infrastructure.redis.storages.code import CodeCacheStorage
 
 
 class CodeLineService:
     def __init__(
         self,
         code_line_gateway: CodeLineDBGateWay,
+        code_cache: CodeCacheStorage,
         llm: ProxyAPI,
         logger: Logger,
     ):
         self.code_line_gateway = code_line_gateway
+        self.code_cache = code_cache
         self.llm = llm
         self.logger = logger
 
     async def add_line(self, code_line_data: CodeLineCreateDTO) -> CodeLineResponseDTO:
-        return await self.code_line_gateway.create_code_line(code_line_data)
+        code_line = await self.code_line_gateway.create_code_line(code_line_data)
+        try:
+            await self.code_cache.append(code_line.chat_id, code_line)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка обновления кэша кода чата {code_line.chat_id}: {str(e)}")
+            await self._invalidate_cache(code_line.chat_id)
+        return code_line
 
     async def get_chat_code(self, chat_id: int) -> List[CodeLineResponseDTO]:
-        return await self.code_line_gateway.get_chat_code(chat_id)
+        try:
+            cached_lines = await self.code_cache.get_lines(chat_id)
+            if cached_lines is not None:
+                return cached_lines
+            version = await self.code_cache.get_version(chat_id)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка чтения кэша кода чата {chat_id}: {str(e)}")
+            return await self.code_line_gateway.get_chat_code(chat_id)
+
+        code_lines = await self.code_line_gateway.get_chat_code(chat_id)
+        try:
+            await self.code_cache.fill(chat_id, version, code_lines)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка заполнения кэша кода чата {chat_id}: {str(e)}")
+        return code_lines
 
     async def code_complete(self, chat_id: int):
         last_code_lines = await self.get_chat_code(chat_id)
         poll_id = last_code_lines[0].poll_id
-        completed_code_lines = self.llm.send_message(
+        completed_code_lines = await self.llm.send_message(
             prompt.COMPLETE_PROMPT.format(last_code_lines=last_code_lines)
         )
         self.logger.info(f"COMPLETED CODE: {completed_code_lines}")
@@ -41,3 +64,10 @@ class CodeLineService:
 
     async def clear_chat_code(self, chat_id: int):
         await self.code_line_gateway.delete_chat_code(chat_id)
+        await self._invalidate_cache(chat_id)
+
+    async def _invalidate_cache(self, chat_id: int):
+        try:
+            await self.code_cache.invalidate(chat_id)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка сброса кэша кода чата {chat_id}: {str(e)}")
@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import random
+from logging import Logger
+from typing import Any, List
+
+from src.application.errors.poll import PollOptionsUnavailableException
+from src.core.config import Settings
+from src.external.llm import prompt
+from src.external.llm.context import build_prompt_context
+from src.external.llm.proxy_api import ProxyAPI
+from src.infrastructure.redis.storages.llm_cache import LLMCacheStorage
+
+
+PROMPT_VERSION = hashlib.sha256(prompt.BASIC_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def is_valid_poll_options(poll_options: Any) -> bool:
+    return (
+        isinstance(poll_options, list)
+        and len(poll_options) >= 4
+        and all(isinstance(line, str) and line != "" for line in poll_options)
+    )
+
+
+class PollOptionsGenerator:
+    def __init__(self, llm: ProxyAPI, llm_cache: LLMCacheStorage, logger: Logger, config: Settings):
+        self.llm = llm
+        self.llm_cache = llm_cache
+        self.logger = logger
+        self.cache_enabled = config.LLM_CACHE_ENABLED
+        self.max_retries = config.LLM_MAX_RETRIES
+        self.backoff_base = config.LLM_BACKOFF_BASE
+        self.backoff_max = config.LLM_BACKOFF_MAX
+        self.context_token_budget = config.LLM_CONTEXT_TOKEN_BUDGET
+        self.context_tail_lines = config.LLM_CONTEXT_TAIL_LINES
+
+    async def generate(
+        self, chat_id: int, code_lines: List[str], use_cache: bool = True
+    ) -> List[str]:
+        use_cache = use_cache and self.cache_enabled
+        context = build_prompt_context(
+            code_lines, self.context_token_budget, self.context_tail_lines
+        )
+        cache_key = self.llm_cache.build_key(self.llm.model, PROMPT_VERSION, context)
+
+        if use_cache:
+            try:
+                cached_options = await self.llm_cache.get(cache_key)
+                if cached_options is not None:
+                    self.logger.info(f"💾 Варианты для чата {chat_id} взяты из кэша LLM")
+                    return cached_options
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка чтения кэша LLM: {str(e)}")
+
+        if self.llm.circuit_breaker.is_open():
+            raise PollOptionsUnavailableException(self.llm.circuit_breaker.retry_after())
+
+        poll_options = await self.llm.send_message(
+            prompt.BASIC_PROMPT.format(last_code_lines=context),
+            validate=is_valid_poll_options,
+        )
+        self.logger.info(f"Poll options: {poll_options}")
+
+        if not is_valid_poll_options(poll_options):
+            self.logger.error(f"Некорректный ответ от LLM для чата {chat_id}: {poll_options}")
+            raise ValueError(f"Некорректный ответ от LLM для чата {chat_id}: {poll_options}")
+
+        if self.cache_enabled:
+            try:
+                await self.llm_cache.set(cache_key, poll_options)
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка записи в кэш LLM: {str(e)}")
+
+        return poll_options
+
+    async def generate_with_retries(
+        self, chat_id: int, code_lines: List[str], use_cache: bool = True
+    ) -> List[str]:
+        for attempt in range(self.max_retries):
+            try:
+                return await self.generate(chat_id, code_lines, use_cache=use_cache)
+            except ValueError:
+                if attempt == self.max_retries - 1:
+                    break
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+                self.logger.warning(
+                    f"🔁 Попытка {attempt + 1}/{self.max_retries} генерации вариантов для чата "
+                    f"{chat_id} не удалась, повтор через {delay:.1f} сек"
+                )
+                await asyncio.sleep(delay)
+
+        self.logger.error(
+            f"❌ Не удалось сгенерировать варианты для чата {chat_id} "
+            f"за {self.max_retries} попыток"
+        )
+        raise PollOptionsUnavailableException(
+            self.llm.circuit_breaker.retry_after() or self.backoff_max
+        )
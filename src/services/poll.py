@@ -1,17 +1,27 @@
+from contextlib import contextmanager
 from logging import Logger
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
 from aiogram import Bot
 from aiogram.types import Message, PollOption
+from src.application.errors.poll import PollOptionsUnavailableException
 from src.application.schemas.code_line import CodeLineCreateDTO, CodeLineResponseDTO
 from src.application.schemas.poll import PollCreateDTO, PollResponseDTO
 from src.application.schemas.poll_option import PollOptionCreateDTO
-from src.external.llm import prompt
-from src.external.llm.proxy_api import ProxyAPI
+from src.core.metrics import poll_cycle_stage_duration, poll_cycles
+from src.core.tracing import span, trace
 from src.infrastructure.postgres.repositories.poll import PollDBGateWay
 from src.infrastructure.redis.storages.poll import PollStorage
 from src.services.code_line import CodeLineService
+from src.services.option_generator import PollOptionsGenerator
 from src.services.poll_option import PollOptionService
+from src.services.speculation import PollSpeculator
+
+
+@contextmanager
+def _stage(name: str) -> Iterator[None]:
+    with span(name), poll_cycle_stage_duration.time(stage=name):
+        yield
 
 
 class PollService:
@@ -21,14 +31,16 @@ class PollService:
         poll_storage: PollStorage,
         poll_option_service: PollOptionService,
         code_line_service: CodeLineService,
-        llm: ProxyAPI,
+        poll_options_generator: PollOptionsGenerator,
+        poll_speculator: PollSpeculator,
         logger: Logger,
     ):
         self.poll_gateway = poll_gateway
         self.poll_storage = poll_storage
         self.poll_option_service = poll_option_service
         self.code_line_service = code_line_service
-        self.llm = llm
+        self.poll_options_generator = poll_options_generator
+        self.poll_speculator = poll_speculator
         self.logger = logger
 
     async def registration(
@@ -39,52 +51,49 @@ class PollService:
             telegram_poll_id=telegram_poll_id,
             question=question,
         )
-        poll = await self.poll_gateway.create_poll(poll_data)
-        self.logger.info(f"Опрос зарегистрирован в БД, {poll.model_dump()}")
-        options = []
-        for option_index, option in enumerate(options_data):
-            poll_option_data = PollOptionCreateDTO(
-                poll_id=poll.telegram_poll_id, option_index=option_index, option_text=option.text
+        options = [
+            PollOptionCreateDTO(
+                poll_id=telegram_poll_id, option_index=option_index, option_text=option.text
             )
-            await self.poll_option_service.registration(poll_option_data)
-            options.append(option_index)
+            for option_index, option in enumerate(options_data)
+        ]
+        poll = await self.poll_gateway.create_poll_with_options(poll_data, options)
+        self.logger.info(
+            f"Опрос зарегистрирован в БД вместе с {len(options)} вариантами, {poll.model_dump()}"
+        )
 
         await self.poll_storage.set_active_poll(poll.chat_id, poll.telegram_poll_id)
         await self.poll_storage.set_next_poll_time(poll.chat_id)
         return poll
 
     async def generate_poll_options(
-        self, chat_id: int, last_code_lines: Optional[List[CodeLineResponseDTO]] = None
+        self,
+        chat_id: int,
+        last_code_lines: Optional[List[CodeLineResponseDTO]] = None,
+        use_cache: bool = True,
     ):
         if last_code_lines is None:
             last_code_lines = []
 
-        poll_options = self.llm.send_message(
-            prompt.BASIC_PROMPT.format(
-                last_code_lines=[code_line.content for code_line in last_code_lines]
-            )
+        return await self.poll_options_generator.generate_with_retries(
+            chat_id, [code_line.content for code_line in last_code_lines], use_cache=use_cache
         )
-        self.logger.info(f"Poll options: {poll_options}")
-
-        if (
-            not isinstance(poll_options, list)
-            or len(poll_options) < 4
-            or any(line == "" for line in poll_options)
-        ):
-            self.logger.error(f"Некорректный ответ от LLM для чата {chat_id}: {poll_options}")
-            raise ValueError("Некорректный ответ от LLM для чата {chat_id}: {code_lines}")
-
-        return poll_options
 
     async def create_poll_for_chat(
-        self, chat_id: int, bot: Bot, last_code_lines: Optional[List[CodeLineResponseDTO]] = None
+        self,
+        chat_id: int,
+        bot: Bot,
+        last_code_lines: Optional[List[CodeLineResponseDTO]] = None,
+        poll_options: Optional[List[str]] = None,
+        use_cache: bool = True,
     ) -> str:
-        poll_options = None
-        while poll_options is None:
-            try:
-                poll_options = await self.generate_poll_options(chat_id, last_code_lines)
-            except ValueError:
-                continue
+        if last_code_lines is None:
+            last_code_lines = []
+
+        if poll_options is None:
+            poll_options = await self.generate_poll_options(
+                chat_id, last_code_lines, use_cache=use_cache
+            )
 
         question = "Выберите следующую строку программы:"
         poll_message = await bot.send_poll(
@@ -99,30 +108,70 @@ class PollService:
         self.logger.info(f"Опрос создан для чата {chat_id}, poll_id={poll_message.poll.id}")
 
         await self.registration(chat_id, poll_message.poll.id, question, poll_message.poll.options)
+        self.poll_speculator.schedule(
+            chat_id,
+            poll_message.poll.id,
+            [code_line.content for code_line in last_code_lines],
+            [option.text for option in poll_message.poll.options],
+        )
 
         return poll_message.poll.id
 
     async def process_chat_poll(self, chat_id: int, bot: Bot):
-        poll_id = await self.poll_storage.get_active_poll(chat_id)
+        with trace("process_chat_poll", chat_id=chat_id):
+            with poll_cycle_stage_duration.time(stage="total"):
+                try:
+                    result = await self._process_chat_poll(chat_id, bot)
+                except Exception:
+                    poll_cycles.inc(result="error")
+                    raise
+        poll_cycles.inc(result=result)
+
+    async def _process_chat_poll(self, chat_id: int, bot: Bot) -> str:
+        with _stage("votes"):
+            poll_id = await self.poll_storage.get_active_poll(chat_id)
+            if poll_id:
+                votes = await self.poll_storage.get_poll_votes(poll_id)
 
         if not poll_id:
             self.logger.warning(
                 f"⚠️ Нет активного опроса для чата {chat_id}, выполняем очистку данных"
             )
             await self.poll_storage.clear_chat_data(chat_id)
-            return
+            await self.poll_storage.clear_next_poll_time(chat_id)
+            return "no_active_poll"
 
         self.logger.info(f"📋 Найден активный опрос {poll_id} для чата {chat_id}")
 
-        votes = await self.poll_storage.get_poll_votes(poll_id)
-
         if not votes:
             self.logger.warning(f"ℹ️ Нет голосов для опроса {poll_id} в чате {chat_id}")
 
         winning_option = await self._get_vote_winner(votes)
 
-        last_code_lines = await self.code_line_service.get_chat_code(chat_id)
-        poll_option = await self.poll_option_service.get_poll_option(poll_id, winning_option)
+        with _stage("code"):
+            last_code_lines = await self.code_line_service.get_chat_code(chat_id)
+            poll_option = await self.poll_option_service.get_poll_option(poll_id, winning_option)
+
+        code_lines_content = [code_line.content for code_line in last_code_lines] + [
+            poll_option.option_text
+        ]
+        with _stage("generate"):
+            poll_options = await self.poll_speculator.take(
+                poll_id, winning_option, code_lines_content
+            )
+            if poll_options is None:
+                try:
+                    poll_options = await self.poll_options_generator.generate_with_retries(
+                        chat_id, code_lines_content
+                    )
+                except PollOptionsUnavailableException as e:
+                    retry_after = max(e.retry_after, 1.0)
+                    self.logger.warning(
+                        f"⏸️ LLM недоступен, опрос {poll_id} в чате {chat_id} остается открытым, "
+                        f"повторная попытка через {retry_after:.0f} сек"
+                    )
+                    await self.poll_storage.set_next_poll_time(chat_id, delay=retry_after)
+                    return "llm_unavailable"
 
         code_line_data = CodeLineCreateDTO(
             chat_id=chat_id,
@@ -130,14 +179,19 @@ class PollService:
             line_number=len(last_code_lines) + 1,
             content=poll_option.option_text,
         )
-        await self.code_line_service.add_line(code_line_data)
-        await self.cleanup_chat_data(chat_id)
+        with _stage("save"):
+            new_code_line = await self.code_line_service.add_line(code_line_data)
+            await self.cleanup_chat_data(chat_id)
 
-        new_poll_id = await self.create_poll_for_chat(
-            chat_id=chat_id, bot=bot, last_code_lines=last_code_lines
-        )
+        code_lines = last_code_lines + [new_code_line]
+
+        with _stage("publish"):
+            new_poll_id = await self.create_poll_for_chat(
+                chat_id=chat_id, bot=bot, last_code_lines=code_lines, poll_options=poll_options
+            )
 
         self.logger.info(f"🆕 Создан новый опрос {new_poll_id} для чата {chat_id}")
+        return "completed"
 
     async def clear_chat(self, message: Message):
         await self.poll_option_service.delete_chat_poll_options(message.chat.id)
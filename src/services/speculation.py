@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import time
+from logging import Logger
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.core.config import Settings
+from src.infrastructure.redis.storages.poll import PollStorage
+from src.services.option_generator import PollOptionsGenerator
+
+
+def context_hash(code_lines: List[str]) -> str:
+    payload = json.dumps(code_lines, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PollSpeculator:
+    def __init__(
+        self,
+        poll_options_generator: PollOptionsGenerator,
+        poll_storage: PollStorage,
+        logger: Logger,
+        config: Settings,
+    ):
+        self.poll_options_generator = poll_options_generator
+        self.poll_storage = poll_storage
+        self.logger = logger
+        self.config = config
+        self.budget = config.SPECULATIVE_BUDGET
+        self.lead_time = config.SPECULATIVE_LEAD_TIME
+        self._semaphore = asyncio.Semaphore(max(1, config.LLM_MAX_CONCURRENT_REQUESTS // 2))
+        self._planners: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[Tuple[str, int], Tuple[asyncio.Task, str]] = {}
+        self._background: Set[asyncio.Task] = set()
+        self._stats = {
+            "calls": 0,
+            "failed": 0,
+            "hits": 0,
+            "misses": 0,
+            "saved_latency": 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def schedule(self, chat_id: int, poll_id: str, code_lines: List[str], poll_options: List[str]):
+        if not self.enabled:
+            return
+
+        planner = asyncio.create_task(
+            self._speculate(chat_id, poll_id, list(code_lines), list(poll_options))
+        )
+        self._planners[poll_id] = planner
+        planner.add_done_callback(lambda _: self._planners.pop(poll_id, None))
+
+    async def take(
+        self, poll_id: str, option_index: int, code_lines: List[str]
+    ) -> Optional[List[str]]:
+        if not self.enabled:
+            return None
+
+        expected_hash = context_hash(code_lines)
+        options, saved_latency = None, 0.0
+        try:
+            pending = self._pending.get((poll_id, option_index))
+            if pending is not None and pending[1] == expected_hash:
+                waiting_started = time.perf_counter()
+                try:
+                    options, duration = await asyncio.shield(pending[0])
+                    saved_latency = max(0.0, duration - (time.perf_counter() - waiting_started))
+                except Exception:
+                    options = None
+
+            speculation = await self.poll_storage.pop_speculation(poll_id, option_index)
+            if options is None and speculation and speculation["context_hash"] == expected_hash:
+                options, saved_latency = speculation["options"], speculation["duration"]
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка чтения спекулятивных вариантов для {poll_id}: {str(e)}")
+        finally:
+            self._cancel_poll(poll_id)
+
+        if options is None:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        self._stats["saved_latency"] += saved_latency
+        self.logger.info(
+            f"🎯 Использованы заранее сгенерированные варианты для опроса {poll_id}, "
+            f"сэкономлено {saved_latency:.2f} сек"
+        )
+        return options
+
+    def get_stats(self) -> dict:
+        taken = self._stats["hits"] + self._stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "budget": self.budget,
+            "calls": self._stats["calls"],
+            "failed": self._stats["failed"],
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+            "hit_rate": round(self._stats["hits"] / taken, 3) if taken else None,
+            "saved_latency": round(self._stats["saved_latency"], 3),
+            "avg_saved_latency": (
+                round(self._stats["saved_latency"] / self._stats["hits"], 3)
+                if self._stats["hits"]
+                else None
+            ),
+        }
+
+    async def stop(self):
+        tasks = [*self._planners.values(), *self._background]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _cancel_poll(self, poll_id: str):
+        planner = self._planners.pop(poll_id, None)
+        if planner is not None:
+            planner.cancel()
+        for key in [key for key in self._pending if key[0] == poll_id]:
+            task, _ = self._pending.pop(key)
+            task.cancel()
+
+    async def _speculate(
+        self, chat_id: int, poll_id: str, code_lines: List[str], poll_options: List[str]
+    ):
+        try:
+            votes = {}
+            if self.budget < len(poll_options):
+                if not await self._wait_for_lead_time(chat_id, poll_id):
+                    return
+                votes = await self.poll_storage.get_poll_votes(poll_id)
+
+            candidates = sorted(range(len(poll_options)), key=lambda i: (-votes.get(i, 0), i))
+            await asyncio.gather(
+                *(
+                    self._speculate_option(
+                        chat_id, poll_id, option_index, code_lines + [poll_options[option_index]]
+                    )
+                    for option_index in candidates[: self.budget]
+                )
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка спекулятивной генерации для опроса {poll_id}: {str(e)}")
+
+    async def _wait_for_lead_time(self, chat_id: int, poll_id: str) -> bool:
+        while True:
+            if await self.poll_storage.get_active_poll(chat_id) != poll_id:
+                return False
+            next_poll_time = await self.poll_storage.get_next_poll_time(chat_id)
+            if next_poll_time is None:
+                return False
+            delay = next_poll_time.timestamp() - self.lead_time - time.time()
+            if delay <= 0:
+                return True
+            await asyncio.sleep(delay)
+
+    async def _speculate_option(
+        self, chat_id: int, poll_id: str, option_index: int, code_lines: List[str]
+    ):
+        expected_hash = context_hash(code_lines)
+        task = asyncio.create_task(self._generate(chat_id, code_lines))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        self._pending[(poll_id, option_index)] = (task, expected_hash)
+        self._stats["calls"] += 1
+
+        try:
+            try:
+                options, duration = await task
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["failed"] += 1
+                self.logger.warning(
+                    f"⚠️ Спекулятивная генерация для опроса {poll_id}, вариант {option_index} "
+                    f"не удалась: {str(e)}"
+                )
+                return
+
+            await self.poll_storage.save_speculation(
+                poll_id,
+                option_index,
+                {"context_hash": expected_hash, "options": options, "duration": duration},
+                ttl=self.config.POLL_TTL * 2,
+            )
+        finally:
+            # Пока результат не записан в Redis, take() должен найти его в задаче
+            self._pending.pop((poll_id, option_index), None)
+        self.logger.debug(
+            f"🔮 Заранее сгенерированы варианты для опроса {poll_id}, вариант {option_index}"
+        )
+
+    async def _generate(self, chat_id: int, code_lines: List[str]) -> Tuple[List[str], float]:
+        async with self._semaphore:
+            started = time.perf_counter()
+            options = await self.poll_options_generator.generate(chat_id, code_lines)
+            return options, time.perf_counter() - started
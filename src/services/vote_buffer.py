@@ -0,0 +1,123 @@
+import asyncio
+import time
+from logging import Logger
+from typing import Dict, Optional, Tuple
+
+from src.core.config import Settings
+from src.infrastructure.redis.storages.poll import PollStorage
+
+
+FAILED_FLUSH_DELAY = 1.0
+
+
+class VoteBuffer:
+    def __init__(self, poll_storage: PollStorage, logger: Logger, config: Settings):
+        self.poll_storage = poll_storage
+        self.logger = logger
+        self.window = config.VOTE_BATCH_WINDOW_MS / 1000
+        self.max_size = config.VOTE_BATCH_MAX_SIZE
+        self._pending: Dict[Tuple[str, int], Optional[int]] = {}
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._stats = {
+            "votes": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "flushed": 0,
+            "max_batch": 0,
+            "flush_time": 0.0,
+            "max_flush_time": 0.0,
+            "failed": 0,
+        }
+
+    def submit(self, poll_id: str, user_id: int, option_index: Optional[int]):
+        key = (poll_id, user_id)
+        if key in self._pending:
+            self._stats["coalesced"] += 1
+        self._pending[key] = option_index
+        self._stats["votes"] += 1
+
+        if len(self._pending) >= self.max_size:
+            self._full.set()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.window)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            if not await self.flush():
+                await asyncio.sleep(FAILED_FLUSH_DELAY)
+
+    async def flush(self) -> bool:
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+            batch, self._pending = self._pending, {}
+
+            started = time.perf_counter()
+            try:
+                changed = await self.poll_storage.apply_votes(
+                    [(poll_id, user_id, option) for (poll_id, user_id), option in batch.items()]
+                )
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                self._stats["failed"] += 1
+                self._requeue(batch)
+                self.logger.error(
+                    f"❌ Ошибка записи пачки из {len(batch)} голосов, повторим позже: {str(e)}"
+                )
+                return False
+
+            elapsed = time.perf_counter() - started
+            self._stats["batches"] += 1
+            self._stats["flushed"] += len(batch)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+            self._stats["flush_time"] += elapsed
+            self._stats["max_flush_time"] = max(self._stats["max_flush_time"], elapsed)
+            self.logger.debug(
+                f"🗳 Записано {len(batch)} голосов ({changed} изменений) за {elapsed * 1000:.1f} мс"
+            )
+            return True
+
+    def _requeue(self, batch: Dict[Tuple[str, int], Optional[int]]):
+        # Голоса, пришедшие во время неудачной записи, новее — их не перетираем.
+        # Повторная запись уже применённого голоса безопасна: скрипт её пропустит.
+        for key, option in batch.items():
+            self._pending.setdefault(key, option)
+
+    def get_stats(self) -> dict:
+        batches = self._stats["batches"]
+        return {
+            "pending": len(self._pending),
+            "votes": self._stats["votes"],
+            "coalesced": self._stats["coalesced"],
+            "batches": batches,
+            "avg_batch": round(self._stats["flushed"] / batches, 1) if batches else None,
+            "max_batch": self._stats["max_batch"],
+            "avg_flush_ms": (
+                round(self._stats["flush_time"] / batches * 1000, 2) if batches else None
+            ),
+            "max_flush_ms": round(self._stats["max_flush_time"] * 1000, 2),
+            "failed": self._stats["failed"],
+        }
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+
+        pending = len(self._pending)
+        if pending and await self.flush():
+            self.logger.info(f"🗳 Перед остановкой записано {pending} голосов из буфера")
+        elif pending:
+            self.logger.error(f"❌ Не удалось записать {pending} голосов перед остановкой")
@@ -0,0 +1,163 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+from logging import Logger
+from typing import Awaitable, Callable
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from src.core.config import Settings
+from src.core.log import stop_logging
+from src.external.telegram.rate_limiter import OutboundRateLimiter
+
+
+LifecycleHook = Callable[[], Awaitable[None]]
+
+
+class DrainingRequestHandler(SimpleRequestHandler):
+    def __init__(
+        self, dispatcher: Dispatcher, bot: Bot, logger: Logger, drain_timeout: float, **kwargs
+    ):
+        super().__init__(dispatcher=dispatcher, bot=bot, **kwargs)
+        self.logger = logger
+        self.drain_timeout = drain_timeout
+
+    async def close(self):
+        in_flight = set(self._background_feed_update_tasks)
+        if in_flight:
+            self.logger.info(f"⏳ Ожидаем завершения {len(in_flight)} апдейтов перед остановкой")
+            _, pending = await asyncio.wait(in_flight, timeout=self.drain_timeout)
+            if pending:
+                self.logger.warning(
+                    f"⚠️ {len(pending)} апдейтов не успели обработаться "
+                    f"за {self.drain_timeout} сек и будут прерваны"
+                )
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        await super().close()
+
+
+def build_webhook_app(
+    bot: Bot,
+    dp: Dispatcher,
+    config: Settings,
+    logger: Logger,
+    on_startup: LifecycleHook,
+    on_shutdown: LifecycleHook,
+) -> web.Application:
+    app = web.Application()
+    DrainingRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        logger=logger,
+        drain_timeout=config.WEBHOOK_DRAIN_TIMEOUT,
+        secret_token=config.WEBHOOK_SECRET or None,
+    ).register(app, path=config.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    async def startup(_: web.Application):
+        await on_startup()
+
+    async def cleanup(_: web.Application):
+        await on_shutdown()
+
+    app.on_startup.append(startup)
+    app.on_cleanup.append(cleanup)
+    return app
+
+
+async def set_webhook(bot: Bot, dp: Dispatcher, config: Settings, logger: Logger):
+    if not config.WEBHOOK_SECRET:
+        logger.warning("⚠️ WEBHOOK_SECRET не задан, подпись входящих апдейтов не проверяется")
+    try:
+        await bot.set_webhook(
+            url=f"{config.WEBHOOK_BASE_URL.rstrip('/')}{config.WEBHOOK_PATH}",
+            secret_token=config.WEBHOOK_SECRET or None,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info(f"🔗 Webhook установлен на {config.WEBHOOK_BASE_URL}{config.WEBHOOK_PATH}")
+    finally:
+        await bot.session.close()
+
+
+def serve_webhook(
+    bot: Bot,
+    dp: Dispatcher,
+    config: Settings,
+    logger: Logger,
+    on_startup: LifecycleHook,
+    on_shutdown: LifecycleHook,
+):
+    app = build_webhook_app(bot, dp, config, logger, on_startup, on_shutdown)
+    web.run_app(
+        app,
+        host=config.WEBHOOK_HOST,
+        port=config.WEBHOOK_PORT,
+        reuse_port=config.WEBHOOK_WORKERS > 1,
+        shutdown_timeout=config.WEBHOOK_DRAIN_TIMEOUT,
+        print=None,
+    )
+
+
+def _serve_webhook_process(index: int, rate_limiter: OutboundRateLimiter, *args):
+    # Сигналы остановки дочерним процессам пересылает только родитель,
+    # иначе Ctrl+C из терминала пришёл бы дважды и прервал бы дренаж апдейтов.
+    os.setpgrp()
+    config: Settings = args[2]
+    rate_limiter.share_between(config.WEBHOOK_WORKERS)
+    if config.METRICS_PORT:
+        # Метрики у каждого процесса свои, поэтому и порт у каждого свой
+        config.METRICS_PORT += index
+    try:
+        serve_webhook(*args)
+    finally:
+        # multiprocessing завершает дочерний процесс через os._exit, минуя atexit
+        stop_logging()
+
+
+def run_webhook(
+    bot: Bot,
+    dp: Dispatcher,
+    config: Settings,
+    logger: Logger,
+    on_startup: LifecycleHook,
+    on_shutdown: LifecycleHook,
+    rate_limiter: OutboundRateLimiter,
+):
+    asyncio.run(set_webhook(bot, dp, config, logger))
+
+    if config.WEBHOOK_WORKERS <= 1:
+        serve_webhook(bot, dp, config, logger, on_startup, on_shutdown)
+        return
+
+    # fork, а не spawn: дочерние процессы наследуют уже собранные bot/dp/контейнер,
+    # а соединения с Redis, Postgres и Telegram открываются в них лениво.
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(
+            target=_serve_webhook_process,
+            args=(index, rate_limiter, bot, dp, config, logger, on_startup, on_shutdown),
+            name=f"webhook-{index}",
+        )
+        for index in range(config.WEBHOOK_WORKERS)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(
+        f"🚀 Запущено {len(processes)} процессов webhook на "
+        f"{config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}"
+    )
+
+    def terminate(signum, frame):
+        logger.info("⏹️ Останавливаем процессы webhook")
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, terminate)
+    signal.signal(signal.SIGINT, terminate)
+    for process in processes:
+        process.join()
@@ -1,78 +1,180 @@
 import asyncio
+import os
+import socket
 import time
+import uuid
 from datetime import datetime
 from logging import Logger
+from typing import List, Set, Tuple
 
 from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from src.core.config import Settings
 from src.external.llm.proxy_api import ProxyAPI
-from src.infrastructure.postgres.connection import engine
 from src.infrastructure.postgres.repositories.code_line import CodeLineDBGateWay
 from src.infrastructure.postgres.repositories.poll import PollDBGateWay
 from src.infrastructure.postgres.repositories.poll_option import PollOptionDBGateWay
 from src.infrastructure.redis.connection import async_redis_client
+from src.infrastructure.redis.storages.code import CodeCacheStorage
 from src.infrastructure.redis.storages.poll import PollStorage
 from src.services.code_line import CodeLineService
+from src.services.option_generator import PollOptionsGenerator
 from src.services.poll import PollService
 from src.services.poll_option import PollOptionService
+from src.services.speculation import PollSpeculator
+
+
+MIN_SLEEP_SECONDS = 0.05
 
 
 class PollWorker:
     def __init__(
         self,
         poll_storage: PollStorage,
+        code_cache: CodeCacheStorage,
         session_maker: async_sessionmaker[AsyncSession],
         llm: ProxyAPI,
+        poll_options_generator: PollOptionsGenerator,
+        poll_speculator: PollSpeculator,
         bot: Bot,
         logger: Logger,
         config: Settings,
     ):
         self.poll_storage = poll_storage
+        self.code_cache = code_cache
         self.session_maker = session_maker
         self.llm = llm
+        self.poll_options_generator = poll_options_generator
+        self.poll_speculator = poll_speculator
         self.bot = bot
         self.logger = logger
         self.config = config
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
         self._task = None
+        self._listener_task = None
+        self._lease_task = None
+        self._wakeup = None
+        self._next_deadline = None
+        self._in_flight: Set[int] = set()
+        self._tick_tasks: Set[asyncio.Task] = set()
         self._running = False
         self._last_check_time = None
+        self._last_tick_stats = None
 
     async def start(self):
+        try:
+            await self.poll_storage.migrate_legacy_next_poll_keys()
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка миграции ключей времени следующего опроса: {str(e)}")
+
+        self._wakeup = asyncio.Event()
+        self._lease_task = asyncio.create_task(self._lease_loop())
+        self._listener_task = asyncio.create_task(self._deadline_listener_loop())
         self._task = asyncio.create_task(self._worker_loop())
         self._running = True
-        self.logger.info("🔄 Poll worker запущен")
+        self.logger.info(f"🔄 Poll worker {self.worker_id} запущен")
 
     async def stop(self):
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-                self._running = False
-                self.logger.info("⏹️ Poll worker остановлен")
-            except asyncio.CancelledError:
-                pass
+        for task in (self._lease_task, self._listener_task, self._task, *self._tick_tasks):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        try:
+            await self.poll_storage.unregister_worker(self.worker_id)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка снятия регистрации воркера {self.worker_id}: {str(e)}")
+        if self._running:
+            self._running = False
+            self.logger.info("⏹️ Poll worker остановлен")
 
     async def _worker_loop(self):
         self.logger.info(
-            f"⚡ Poll worker запущен с интервалом {self.config.WORKER_CHECK_INTERVAL} секунд"
+            f"⚡ Poll worker запущен в режиме ожидания ближайшего дедлайна "
+            f"(максимальный сон {self.config.WORKER_MAX_SLEEP} секунд)"
         )
         while True:
+            self._wakeup.clear()
             try:
                 await self._process_expired_polls()
                 self._last_check_time = time.time()
             except Exception as e:
                 self.logger.error(f"🚨 Критическая ошибка в poll worker: {str(e)}")
-            await asyncio.sleep(self.config.WORKER_CHECK_INTERVAL)
+            await self._wait_for_next_deadline()
+
+    async def _wait_for_next_deadline(self):
+        if len(self._in_flight) >= self.config.WORKER_CONCURRENCY:
+            # Брать новые чаты некуда, поэтому просроченные дедлайны не повод просыпаться:
+            # ждём, пока _run_expired_chat освободит слот
+            while len(self._in_flight) >= self.config.WORKER_CONCURRENCY:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            return
+
+        try:
+            # Без нижней границы: дедлайн, наступивший после выборки просроченных чатов,
+            # иначе проспал бы до следующего, ведь уведомление о нём уже не придёт
+            earliest_deadline = await self.poll_storage.get_earliest_deadline()
+            self._next_deadline = earliest_deadline
+            if earliest_deadline is None:
+                timeout = self.config.WORKER_MAX_SLEEP
+            else:
+                timeout = min(earliest_deadline - time.time(), self.config.WORKER_MAX_SLEEP)
+        except Exception as e:
+            self.logger.error(f"❌ Не удалось получить ближайший дедлайн: {str(e)}")
+            timeout = self.config.WORKER_CHECK_INTERVAL
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, MIN_SLEEP_SECONDS))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _deadline_listener_loop(self):
+        while True:
+            try:
+                async for _ in self.poll_storage.listen_deadline_updates():
+                    self._wakeup.set()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка подписки на обновления дедлайнов: {str(e)}")
+                self._wakeup.set()
+                await asyncio.sleep(self.config.WORKER_CHECK_INTERVAL)
+
+    async def _lease_loop(self):
+        interval = max(1.0, self.config.WORKER_LEASE_TTL / 3)
+        while True:
+            try:
+                await self.poll_storage.register_worker(
+                    self.worker_id, time.time(), self.config.WORKER_LEASE_TTL
+                )
+                if self._in_flight:
+                    await self.poll_storage.renew_chat_leases(
+                        list(self._in_flight), self.worker_id, self.config.WORKER_LEASE_TTL
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка продления аренды чатов: {str(e)}")
+            await asyncio.sleep(interval)
 
     async def _process_expired_polls(self):
-        current_timestamp = int(time.time())
+        current_timestamp = time.time()
         self.logger.info(
             f"🔍 Проверка истекших опросов на {datetime.fromtimestamp(current_timestamp)}"
         )
 
+        free_slots = self.config.WORKER_CONCURRENCY - len(self._in_flight)
+        if free_slots <= 0:
+            self.logger.debug("⏳ Все слоты воркера заняты, ожидаем завершения обработки")
+            return
+
         try:
-            expired_chats = await self.poll_storage.get_expired_chats(current_timestamp)
+            expired_chats = await self.poll_storage.claim_expired_chats(
+                current_timestamp, self.worker_id, self.config.WORKER_LEASE_TTL, free_slots
+            )
 
             if not expired_chats:
                 self.logger.info("✅ Нет истекших опросов для обработки")
@@ -80,18 +182,75 @@ class PollWorker:
 
             self.logger.info(f"⏰ Найдено {len(expired_chats)} истекших опросов для обработки")
 
-            for chat_id in expired_chats:
-                try:
-                    await self._process_expired_chat(chat_id)
-                except Exception as e:
-                    self.logger.error(f"❌ Ошибка обработки чата {chat_id}: {str(e)}")
-
-            self.logger.info("✅ Обработка истекших опросов завершена")
+            self._in_flight.update(chat_id for chat_id, _ in expired_chats)
+            tick_task = asyncio.create_task(self._run_tick(current_timestamp, expired_chats))
+            self._tick_tasks.add(tick_task)
+            tick_task.add_done_callback(self._tick_tasks.discard)
 
         except Exception as e:
             self.logger.error(f"❌ Ошибка в процессе проверки опросов: {str(e)}")
 
-    async def _process_expired_chat(self, chat_id: int):
+    async def _run_tick(self, started_at: float, expired_chats: List[Tuple[int, float]]):
+        tick_stats = {"processed": 0, "failed": 0, "lags": []}
+        await asyncio.gather(
+            *(
+                self._run_expired_chat(chat_id, deadline, tick_stats)
+                for chat_id, deadline in expired_chats
+            )
+        )
+        self._record_tick_stats(started_at, tick_stats)
+        self.logger.info("✅ Обработка истекших опросов завершена")
+
+    async def _run_expired_chat(self, chat_id: int, deadline: float, tick_stats: dict):
+        tick_stats["lags"].append(max(0.0, time.time() - deadline))
+        try:
+            try:
+                processed = await asyncio.wait_for(
+                    self._process_expired_chat(chat_id),
+                    timeout=self.config.WORKER_CHAT_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                self.logger.error(
+                    f"⌛ Превышено время обработки чата {chat_id} ({self.config.WORKER_CHAT_TIMEOUT} сек), "
+                    f"повторная попытка после истечения аренды"
+                )
+                processed = False
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка обработки чата {chat_id}: {str(e)}")
+                processed = False
+
+            tick_stats["processed" if processed else "failed"] += 1
+        finally:
+            self._in_flight.discard(chat_id)
+            await self._release_chat_lease(chat_id)
+            self._wakeup.set()
+
+    async def _release_chat_lease(self, chat_id: int):
+        try:
+            await self.poll_storage.release_chat_lease(chat_id, self.worker_id)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка освобождения аренды чата {chat_id}: {str(e)}")
+
+    def _record_tick_stats(self, started_at: float, tick_stats: dict):
+        duration = time.time() - started_at
+        lags = tick_stats["lags"]
+        total = tick_stats["processed"] + tick_stats["failed"]
+        self._last_tick_stats = {
+            "chats": total,
+            "processed": tick_stats["processed"],
+            "failed": tick_stats["failed"],
+            "duration": round(duration, 3),
+            "throughput": round(total / duration, 2) if duration > 0 else float(total),
+            "avg_lag": round(sum(lags) / len(lags), 3) if lags else 0.0,
+            "max_lag": round(max(lags), 3) if lags else 0.0,
+        }
+        self.logger.info(
+            f"📈 Тик воркера: {total} чатов за {self._last_tick_stats['duration']} сек "
+            f"({self._last_tick_stats['throughput']} чатов/сек), ошибок {tick_stats['failed']}, "
+            f"задержка ср. {self._last_tick_stats['avg_lag']} сек / макс. {self._last_tick_stats['max_lag']} сек"
+        )
+
+    async def _process_expired_chat(self, chat_id: int) -> bool:
         self.logger.info(f"🔧 Начало обработки чата {chat_id}")
 
         try:
@@ -101,27 +260,33 @@ class PollWorker:
                 code_line_gateway = CodeLineDBGateWay(session)
 
                 poll_option_service = PollOptionService(poll_option_gateway, self.logger)
-                code_line_service = CodeLineService(code_line_gateway, self.llm, self.logger)
+                code_line_service = CodeLineService(
+                    code_line_gateway, self.code_cache, self.llm, self.logger
+                )
                 poll_service = PollService(
                     poll_gateway,
                     self.poll_storage,
                     poll_option_service,
                     code_line_service,
-                    self.llm,
+                    self.poll_options_generator,
+                    self.poll_speculator,
                     self.logger,
                 )
                 await poll_service.process_chat_poll(chat_id, self.bot)
 
             self.logger.info(f"✅ Обработка чата {chat_id} завершена успешно")
+            return True
 
         except Exception as e:
             self.logger.error(f"❌ Критическая ошибка при обработке чата {chat_id}: {str(e)}")
             try:
                 await self.poll_storage.clear_chat_data(chat_id)
+                await self.poll_storage.clear_next_poll_time(chat_id)
             except Exception as cleanup_error:
                 self.logger.error(
                     f"❌ Ошибка очистки данных для чата {chat_id}: {str(cleanup_error)}"
                 )
+            return False
 
     async def get_status(self) -> dict:
         now = time.time()
@@ -129,21 +294,45 @@ class PollWorker:
             return {"status": "stopped", "last_check_ago": None}
         if self._last_check_time is None:
             return {"status": "running", "last_check_ago": None}
+        try:
+            active_workers = len(
+                await self.poll_storage.get_active_workers(now, self.config.WORKER_LEASE_TTL)
+            )
+        except Exception:
+            active_workers = None
         return {
             "status": "running",
+            "worker_id": self.worker_id,
+            "active_workers": active_workers,
+            "in_flight": len(self._in_flight),
             "last_check_ago": int(now - self._last_check_time),
             "check_interval": self.config.WORKER_CHECK_INTERVAL,
+            "next_deadline_in": (
+                max(0, int(self._next_deadline - now)) if self._next_deadline is not None else None
+            ),
+            "concurrency": self.config.WORKER_CONCURRENCY,
+            "last_tick": self._last_tick_stats,
         }
 
 
-def setup_poll_worker(config: Settings, logger: Logger, bot: Bot) -> PollWorker:
-    session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+def setup_poll_worker(
+    config: Settings,
+    logger: Logger,
+    bot: Bot,
+    llm: ProxyAPI,
+    poll_options_generator: PollOptionsGenerator,
+    poll_speculator: PollSpeculator,
+    session_maker: async_sessionmaker[AsyncSession],
+) -> PollWorker:
     poll_storage = PollStorage(async_redis_client, logger, config)
-    llm = ProxyAPI(config, logger)
+    code_cache = CodeCacheStorage(async_redis_client, logger, config)
     poll_worker = PollWorker(
         poll_storage=poll_storage,
+        code_cache=code_cache,
         session_maker=session_maker,
         llm=llm,
+        poll_options_generator=poll_options_generator,
+        poll_speculator=poll_speculator,
         bot=bot,
         logger=logger,
         config=config,